@@ -10,6 +10,7 @@ Usage:
 """
 
 import os
+import numpy as np
 import pandas as pd
 import warnings
 warnings.filterwarnings('ignore')
@@ -17,17 +18,23 @@ warnings.filterwarnings('ignore')
 # Import configuration
 from src.utils.config import (
     TICKER, DATA_START, DATA_END, INITIAL_CAPITAL,
-    WARMUP_DAYS, WINDOW_SIZE_DAYS, LOOKBACK_WINDOW,
-    HOLD_HORIZON, ML_VETO_THRESHOLD
+    WARMUP_DAYS, WINDOW_SIZE_DAYS,
+    HOLD_HORIZON, ML_VETO_THRESHOLD, ML_C_GRID,
+    STOP_ATR_MULT, TARGET_ATR_MULT, TRAIL_ATR_MULT,
+    SCREEN_SMA_WINDOWS, SCREEN_RSI_BANDS, SCREEN_BB_WINDOWS, SCREEN_BB_STDS
 )
 
 # Import modules
 from src.data.data_loader import load_data
 from src.features.feature_engineer import FeatureEngineer
 from src.signals.signal_generator import SignalGenerator
+from src.signals.signal_matrix import SignalMatrix
 from src.models.logistic_filter import MLFilter
 from src.execution.execution_engine import ExecutionEngine
+from src.execution.exit_engine import ExitEngine
 from src.backtest.backtester import TradePlanGenerator
+from src.backtest.pipeline import walk_forward_filter
+from src.utils.date_index import date_slice
 
 
 def main():
@@ -44,8 +51,7 @@ def main():
     df_full = load_data(TICKER, start_date='2025-11-01', end_date='2025-12-31', fyers_secrets_path=secrets_path)
     
     # Slice to backtest period
-    mask_stress = (df_full.index >= DATA_START) & (df_full.index <= DATA_END)
-    df = df_full[mask_stress].copy()
+    df = date_slice(df_full, DATA_START, DATA_END).copy()
     print(f"Nov-Dec slice: {len(df)} rows")
     
     # ============================================================
@@ -67,46 +73,45 @@ def main():
     df_signals = sig_engine.generate_signals(df_features)
     print(f"After signals: {len(df_signals)} rows")
     
+    # Screen rule variants against the same features in one batched pass,
+    # with the same exits as the main backtest
+    exit_engine = ExitEngine(
+        stop_atr_mult=STOP_ATR_MULT,
+        target_atr_mult=TARGET_ATR_MULT,
+        trail_atr_mult=TRAIL_ATR_MULT,
+        max_hold_bars=HOLD_HORIZON
+    )
+    variants = SignalMatrix.grid(SCREEN_SMA_WINDOWS, SCREEN_RSI_BANDS, SCREEN_BB_WINDOWS, SCREEN_BB_STDS)
+    direction_matrix = variants.compute(df_features, history=df)
+    screen_stats, _ = ExecutionEngine(initial_capital=INITIAL_CAPITAL).run_batch_backtest(
+        df_features, direction_matrix, hold_horizon_days=HOLD_HORIZON, exit_engine=exit_engine)
+    print(f"\n--- RULE VARIANT SCREEN ({len(variants.names)} variants, no ML filter) ---")
+    print(screen_stats.sort_values('Sharpe Ratio', ascending=False).head(5)[['Return %', 'Sharpe Ratio', 'Total Trades']].round(2))
+    
     # ============================================================
     # STEP 4: Apply ML Filter (Rolling Walk-Forward)
     # ============================================================
-    ml_filter = MLFilter(lookback_window=LOOKBACK_WINDOW)
-    experiment_signals = df_signals.copy()
-    experiment_signals['veto'] = False
-    experiment_signals['ml_prob'] = 0.5
-    
     print("Running Rolling Walk-Forward ML Loop (Logistic Regression)...")
-    valid_dates = sorted(df_signals.index[df_signals.index >= (df_signals.index[0] + pd.Timedelta(days=WARMUP_DAYS))])
-    print(f"Valid dates for rolling: {len(valid_dates)}")
-    
-    for current_date in valid_dates:
-        # Lag 2 days to avoid Lookahead Bias
-        train_end = current_date - pd.Timedelta(days=2)
-        train_start = current_date - pd.Timedelta(days=WINDOW_SIZE_DAYS + 10)
-        train_mask = (df_signals.index >= train_start) & (df_signals.index <= train_end)
-        df_train = df_signals[train_mask]
-        if len(df_train) < 5:
-            continue
-        ml_filter.train(df_train)
-        
-        current_row = df_signals.loc[[current_date]]
-        probs = ml_filter.predict_probs(current_row)
-        prob = probs[0] if len(probs) > 0 else 0.5
-        
-        experiment_signals.loc[current_date, 'ml_prob'] = prob
-        if prob < ML_VETO_THRESHOLD:
-            experiment_signals.loc[current_date, 'veto'] = True
-            experiment_signals.loc[current_date, 'Signal'] = 'FLAT'
-            experiment_signals.loc[current_date, 'direction'] = 0
+    experiment_signals, selector, path_report = walk_forward_filter(
+        df_signals,
+        veto_threshold=ML_VETO_THRESHOLD,
+        warmup_days=WARMUP_DAYS,
+        window_size_days=WINDOW_SIZE_DAYS,
+        c_grid=ML_C_GRID
+    )
     
     print(f"Rolling Loop Complete. Vetoed {experiment_signals['veto'].sum()} Signals.")
+    if selector is not None:
+        final_C = selector.Cs[selector.choose()]
+        print(f"Path selection: {len(selector.Cs)} C values, final choice C={final_C:g}")
     
     # ============================================================
     # STEP 5: Run Backtest
     # ============================================================
     exec_engine = ExecutionEngine(initial_capital=INITIAL_CAPITAL)
     print(f"Running Backtest on {DATA_START} to {DATA_END}...")
-    final_stats, trade_log, equity_curve = exec_engine.run_backtest(experiment_signals, hold_horizon_days=HOLD_HORIZON)
+    final_stats, trade_log, equity_curve = exec_engine.run_backtest(
+        experiment_signals, hold_horizon_days=HOLD_HORIZON, exit_engine=exit_engine)
     
     print("\n--- PERFORMANCE METRICS ---")
     print(f"Total PnL: {final_stats['Total PnL']:.2f}")
@@ -116,7 +121,6 @@ def main():
     print(f"Win Rate: {final_stats['Win Rate']:.1f}%")
     
     # Buy & Hold Comparison
-    import numpy as np
     bh_start_price = experiment_signals['Close'].iloc[0]
     bh_end_price = experiment_signals['Close'].iloc[-1]
     bh_return_pct = ((bh_end_price - bh_start_price) / bh_start_price) * 100
@@ -141,6 +145,8 @@ def main():
     results_dir = os.path.join(os.path.dirname(__file__), 'backtest_results')
     os.makedirs(results_dir, exist_ok=True)
     trade_log.to_csv(os.path.join(results_dir, 'trade_log.csv'))
+    if path_report:
+        pd.DataFrame(path_report).to_csv(os.path.join(results_dir, 'ml_path_selection.csv'), index=False)
     print(f"Results saved to: {results_dir}")
     
     # ============================================================
@@ -148,7 +154,8 @@ def main():
     # ============================================================
     planner = TradePlanGenerator()
     print("\nTraining Final Logistic Model on Full Nov-Dec Data...")
-    ml_filter_final = MLFilter()
+    # A C chosen on the path is refit with the path's solver so it means the same model
+    ml_filter_final = MLFilter(C=final_C, solver=MLFilter.PATH_SOLVER) if selector is not None else MLFilter()
     ml_filter_final.train(df_signals)
     
     # Load Jan data
@@ -157,7 +164,7 @@ def main():
     df_jan_signals = SignalGenerator(threshold=1).generate_signals(df_jan)
     
     print("\n--- JAN 1-8 SIGNAL INSPECTION (LOGISTIC REGRESSION) ---")
-    jan_slice = df_jan_signals[(df_jan_signals.index >= '2026-01-01')]
+    jan_slice = date_slice(df_jan_signals, '2026-01-01')
     if not jan_slice.empty:
         probs = ml_filter_final.predict_probs(jan_slice)
         for i, date in enumerate(jan_slice.index):
@@ -170,7 +177,8 @@ def main():
     print("---------------------------------\n")
     
     df_jan_final = ml_filter_final.apply_veto(df_jan_signals, threshold=ML_VETO_THRESHOLD)
-    trade_plan = planner.generate_plan(df_jan_final, exec_engine, start_date='2026-01-01', end_date='2026-01-08')
+    trade_plan = planner.generate_plan(df_jan_final, exec_engine, start_date='2026-01-01', end_date='2026-01-08',
+                                       exit_engine=exit_engine)
     plan_path = os.path.join(os.path.dirname(__file__), 'trade_plan_jan1_8_logistic.csv')
     trade_plan.to_csv(plan_path, index=False)
     print(f"Trade Plan saved to: {plan_path}")
@@ -5,13 +5,14 @@ Trade plan generation for forward forecasts.
 
 import pandas as pd
 import numpy as np
-from src.utils.config import RISK_PER_TRADE_PCT
+from src.utils.config import RISK_PER_TRADE_PCT, STOP_ATR_MULT
+from src.utils.date_index import date_slice
 
 
 class TradePlanGenerator:
     """Generates actionable trade plans for future dates."""
     
-    def generate_plan(self, df_signals, exec_engine, start_date, end_date):
+    def generate_plan(self, df_signals, exec_engine, start_date, end_date, exit_engine=None):
         """
         Generate a trade plan for the given date range.
         
@@ -20,6 +21,8 @@ class TradePlanGenerator:
             exec_engine: ExecutionEngine instance for capital reference
             start_date: Start date for plan
             end_date: End date for plan
+            exit_engine: Optional ExitEngine supplying the stop and target levels
+                         and the sizing distance (its risk_atr_mult)
             
         Returns:
             DataFrame with Date, Signal, Qty, EntryPrice, StopLoss, etc.
@@ -28,11 +31,11 @@ class TradePlanGenerator:
         df_plan = df_signals.copy()
         df_plan['NextOpen'] = df_plan['Open'].shift(-1)
         
-        mask = (df_plan.index >= start_date) & (df_plan.index <= end_date)
-        plan_df = df_plan[mask].copy()
+        plan_df = date_slice(df_plan, start_date, end_date).copy()
         output = []
         
         capital = exec_engine.initial_capital
+        risk_atr_mult = exit_engine.risk_atr_mult if exit_engine is not None else STOP_ATR_MULT
         
         for date, row in plan_df.iterrows():
             sig = row['Signal']
@@ -47,7 +50,7 @@ class TradePlanGenerator:
                 if atr > 0:
                     # Calculate Qty based on Risk
                     risk_amt = capital * RISK_PER_TRADE_PCT
-                    stop_dist = 1.2 * atr
+                    stop_dist = risk_atr_mult * atr
                     qty = int(risk_amt / stop_dist)
                     
                     # Projected Entry
@@ -58,15 +61,20 @@ class TradePlanGenerator:
                         entry = row['Close']  # Estimate
                     
                     # Calculate Levels
-                    if sig == 'LONG':
-                        stop_price = entry - stop_dist
-                        sl = round(stop_price, 2)
+                    direction = 1 if sig == 'LONG' else -1
+                    if exit_engine is not None:
+                        stop_price, target_price = exit_engine.levels(direction, entry, atr)
+                        if pd.notna(stop_price):
+                            sl = round(stop_price, 2)
+                        if pd.notna(target_price):
+                            target = round(target_price, 2)
+                        hold = exit_engine.max_hold_bars
+                        exit_cond = f"Stop/Target or Hold {hold} Day" if hold else "Stop/Target"
                     else:
-                        stop_price = entry + stop_dist
+                        stop_price = entry - direction * stop_dist
                         sl = round(stop_price, 2)
-                    
-                    exit_cond = "Hold 1 Day"
-                    target = "Open T+2"
+                        exit_cond = "Hold 1 Day"
+                        target = "Open T+2"
             
             output.append({
                 'Date': date.date(),
@@ -0,0 +1,202 @@
+# Incremental pipeline module
+"""
+Checkpointed incremental runs of the walk-forward pipeline.
+
+A checkpoint holds just enough state to continue where the last run
+stopped: a short tail of raw bars (indicator warm-up plus the ML training
+window), the ML results for those dates, the last trained model and path
+selector, and the backtest state (open position, capital, equity curve and
+trade log). A daily run appends the new bars, rebuilds features on the
+tail, scores only the new dates and steps the backtest forward, giving the
+same results as rerunning the whole history.
+
+Usage:
+    python -m src.backtest.incremental
+"""
+
+import os
+import pickle
+
+import pandas as pd
+
+from src.utils.config import (
+    TICKER, DATA_START, INITIAL_CAPITAL, LOOKBACK_WINDOW,
+    CHECKPOINT_PATH, FEATURE_WARMUP_BARS
+)
+from src.features.feature_engineer import FeatureEngineer
+from src.signals.signal_generator import SignalGenerator
+from src.models.logistic_filter import MLFilter
+from src.execution.execution_engine import ExecutionEngine
+from src.execution.exit_engine import ExitEngine
+from src.backtest.pipeline import DEFAULT_PARAMS, walk_forward_filter
+
+
+class PipelineCheckpoint:
+    """Pipeline state carried between incremental runs."""
+
+    def __init__(self, symbol=TICKER, params=None, initial_capital=INITIAL_CAPITAL):
+        self.symbol = symbol
+        self.params = dict(DEFAULT_PARAMS)
+        self.params.update(params or {})
+        self.initial_capital = initial_capital
+        self.raw_tail = pd.DataFrame()     # recent OHLCV bars
+        self.first_signal_date = None      # warm-up origin of the full history
+        self.ml_results = pd.DataFrame()   # ml_prob / veto for dates in the tail
+        self.ml_filter = MLFilter(lookback_window=LOOKBACK_WINDOW)
+        self.selector = None
+        self.backtest_state = None
+
+    @property
+    def last_bar_date(self):
+        return self.raw_tail.index[-1] if not self.raw_tail.empty else None
+
+    def save(self, path):
+        """
+        Write the checkpoint atomically.
+
+        The state is pickled as a plain dict, not the object itself, so a
+        checkpoint written under `python -m src.backtest.incremental` (where
+        this class lives in __main__) loads from any other entry point.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(dict(vars(self)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        checkpoint = cls.__new__(cls)
+        checkpoint.__dict__.update(state)
+        return checkpoint
+
+
+def run_incremental(bars, checkpoint=None):
+    """
+    Advance the pipeline over bars newer than the checkpoint.
+
+    Args:
+        bars: OHLCV DataFrame with Date index; rows at or before the
+              checkpoint's last bar are ignored
+        checkpoint: PipelineCheckpoint from the previous run (None starts
+                    from scratch, equivalent to a full run)
+
+    Returns:
+        Tuple of (checkpoint, (stats_dict, trade_log_df, equity_curve_df))
+    """
+    if checkpoint is None:
+        checkpoint = PipelineCheckpoint()
+    p = checkpoint.params
+    exec_engine = ExecutionEngine(initial_capital=checkpoint.initial_capital)
+    state = checkpoint.backtest_state or exec_engine.new_state()
+
+    last_bar = checkpoint.last_bar_date
+    new_bars = bars[bars.index > last_bar] if last_bar is not None else bars
+    raw = pd.concat([checkpoint.raw_tail, new_bars]) if last_bar is not None else new_bars.copy()
+    df_features = FeatureEngineer().add_features(raw)
+    if df_features.empty:
+        # Too short for indicators yet: keep the bars and the initial state
+        checkpoint.raw_tail = raw
+        checkpoint.backtest_state = state
+        return checkpoint, exec_engine.backtest_results(state)
+
+    df_signals = SignalGenerator(threshold=1).generate_signals(df_features)
+    if checkpoint.first_signal_date is None:
+        checkpoint.first_signal_date = df_signals.index[0]
+
+    # Score only dates not seen before, then restore earlier results
+    prev = checkpoint.ml_results
+    experiment_signals, selector, _ = walk_forward_filter(
+        df_signals,
+        veto_threshold=p['veto_threshold'],
+        warmup_days=p['warmup_days'],
+        window_size_days=p['window_size_days'],
+        c_grid=p['c_grid'],
+        ml_filter=checkpoint.ml_filter,
+        selector=checkpoint.selector,
+        first_date=checkpoint.first_signal_date,
+        score_after=prev.index[-1] if not prev.empty else None
+    )
+    known = prev.index.intersection(experiment_signals.index)
+    if not known.empty:
+        experiment_signals.loc[known, 'ml_prob'] = prev.loc[known, 'ml_prob']
+        experiment_signals.loc[known, 'veto'] = prev.loc[known, 'veto']
+        vetoed = known[prev.loc[known, 'veto'].to_numpy(dtype=bool)]
+        experiment_signals.loc[vetoed, 'Signal'] = 'FLAT'
+        experiment_signals.loc[vetoed, 'direction'] = 0
+
+    exit_engine = ExitEngine(
+        stop_atr_mult=p['stop_atr_mult'],
+        target_atr_mult=p['target_atr_mult'],
+        trail_atr_mult=p['trail_atr_mult'],
+        max_hold_bars=p['hold_horizon']
+    )
+    state = exec_engine.step_backtest(experiment_signals, state, hold_horizon_days=p['hold_horizon'],
+                                      exit_engine=exit_engine)
+
+    # Keep the training window, any open trade's path and indicator warm-up
+    tail_start = raw.index[-1] - pd.Timedelta(days=p['window_size_days'] + 10)
+    if state['position'] != 0 and state['entry_bar'] is not None:
+        tail_start = min(tail_start, state['entry_bar'])
+    keep_from = max(0, raw.index.searchsorted(tail_start) - FEATURE_WARMUP_BARS)
+
+    checkpoint.raw_tail = raw.iloc[keep_from:]
+    checkpoint.ml_results = experiment_signals.loc[experiment_signals.index >= checkpoint.raw_tail.index[0],
+                                                   ['ml_prob', 'veto']]
+    checkpoint.selector = selector
+    checkpoint.backtest_state = state
+    return checkpoint, exec_engine.backtest_results(state)
+
+
+def run_daily(checkpoint_path=CHECKPOINT_PATH, symbol=TICKER, start_date=DATA_START, end_date=None,
+              fyers_secrets_path=None):
+    """
+    Nightly job: load the checkpoint, fetch bars since its last bar, advance and save.
+
+    Args:
+        checkpoint_path: Checkpoint file (created on the first run)
+        symbol: Ticker for a new checkpoint
+        start_date: History start for a new checkpoint
+        end_date: Last date to fetch (defaults to today)
+        fyers_secrets_path: Passed through to load_data
+
+    Returns:
+        Tuple of (stats_dict, trade_log_df, equity_curve_df)
+    """
+    from src.data.data_loader import load_data
+
+    if os.path.exists(checkpoint_path):
+        checkpoint = PipelineCheckpoint.load(checkpoint_path)
+        if checkpoint.last_bar_date is not None:
+            fetch_from = checkpoint.last_bar_date.strftime('%Y-%m-%d')
+            print(f"Checkpoint loaded: last bar {fetch_from}")
+        else:
+            # An earlier run got no bars at all
+            fetch_from = start_date
+            print("Checkpoint loaded: no bars yet. Fetching from the start...")
+    else:
+        checkpoint = PipelineCheckpoint(symbol=symbol)
+        fetch_from = start_date
+        print("No checkpoint found. Starting a full run...")
+
+    end_date = end_date or pd.Timestamp.today().strftime('%Y-%m-%d')
+    bars = load_data(checkpoint.symbol, start_date=fetch_from, end_date=end_date,
+                     fyers_secrets_path=fyers_secrets_path)
+    checkpoint, results = run_incremental(bars, checkpoint)
+    checkpoint.save(checkpoint_path)
+
+    stats = results[0]
+    last_bar = checkpoint.last_bar_date.date() if checkpoint.last_bar_date is not None else None
+    position = checkpoint.backtest_state['position'] if checkpoint.backtest_state is not None else 0
+    print(f"Checkpoint saved: last bar {last_bar} ({len(checkpoint.raw_tail)} bars kept)")
+    print(f"Total PnL: {stats['Total PnL']:.2f} | Sharpe: {stats['Sharpe Ratio']:.2f} | "
+          f"Trades: {stats['Total Trades']} | Open position: {position}")
+    return results
+
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    run_daily(checkpoint_path=os.path.join(root, CHECKPOINT_PATH),
+              fyers_secrets_path=os.path.join(root, 'fyers_secrets.json'))
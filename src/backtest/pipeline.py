@@ -0,0 +1,161 @@
+# Pipeline module
+"""
+Reusable pieces of the run_strategy pipeline.
+
+walk_forward_filter is the rolling ML veto loop from run_strategy.main, and
+run_symbol_backtest runs the whole load -> features -> signals -> veto ->
+backtest chain for one symbol and parameter set, which is the unit of work
+for sharded runs.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import (
+    DATA_START, DATA_END, INITIAL_CAPITAL,
+    WARMUP_DAYS, WINDOW_SIZE_DAYS, LOOKBACK_WINDOW,
+    HOLD_HORIZON, ML_VETO_THRESHOLD, ML_C_GRID,
+    STOP_ATR_MULT, TARGET_ATR_MULT, TRAIL_ATR_MULT
+)
+from src.features.feature_engineer import FeatureEngineer
+from src.signals.signal_generator import SignalGenerator
+from src.models.logistic_filter import MLFilter, PathSelector
+from src.execution.execution_engine import ExecutionEngine
+from src.execution.exit_engine import ExitEngine
+from src.utils.date_index import date_slice
+
+
+# Defaults for run_symbol_backtest; any key can be overridden per work unit
+DEFAULT_PARAMS = {
+    'hold_horizon': HOLD_HORIZON,
+    'veto_threshold': ML_VETO_THRESHOLD,
+    'warmup_days': WARMUP_DAYS,
+    'window_size_days': WINDOW_SIZE_DAYS,
+    'c_grid': ML_C_GRID,
+    'stop_atr_mult': STOP_ATR_MULT,
+    'target_atr_mult': TARGET_ATR_MULT,
+    'trail_atr_mult': TRAIL_ATR_MULT,
+}
+
+
+def walk_forward_filter(df_signals, veto_threshold=ML_VETO_THRESHOLD, warmup_days=WARMUP_DAYS,
+                        window_size_days=WINDOW_SIZE_DAYS, c_grid=None, ml_filter=None, selector=None,
+                        first_date=None, score_after=None):
+    """
+    Apply the rolling walk-forward ML veto to a signal frame.
+
+    For each date after the warm-up, the filter is retrained on a window
+    ending 2 days earlier (no lookahead) and signals with probability below
+    veto_threshold are set FLAT.
+
+    Args:
+        df_signals: DataFrame with features, Signal and direction columns
+        veto_threshold: Minimum P(up) to keep a signal
+        warmup_days: Calendar days skipped before the first prediction
+        window_size_days: Training window length (plus a 10-day buffer)
+        c_grid: Optional C values; selects C along a regularization path
+        ml_filter: MLFilter to retrain (a new one is created if None)
+        selector: PathSelector to continue from; overrides c_grid
+        first_date: Start of the signal history that the warm-up counts
+                    from (defaults to the first row of df_signals)
+        score_after: Only score dates after this one (incremental runs)
+
+    Returns:
+        Tuple of (experiment_signals, selector, path_report). selector is the
+        PathSelector (None without c_grid) and path_report lists the chosen
+        C and per-candidate probabilities for each date.
+    """
+    if ml_filter is None:
+        ml_filter = MLFilter(lookback_window=LOOKBACK_WINDOW)
+    experiment_signals = df_signals.copy()
+    experiment_signals['veto'] = False
+    experiment_signals['ml_prob'] = 0.5
+
+    # Optional model selection: fit a C path per window and pick C online
+    if selector is None and c_grid:
+        selector = PathSelector(c_grid)
+    outcomes = np.sign(df_signals['Close'].shift(-1) - df_signals['Close'])
+    path_report = []
+
+    first_date = df_signals.index[0] if first_date is None else first_date
+    valid_dates = date_slice(df_signals, first_date + pd.Timedelta(days=warmup_days)).index
+    if score_after is not None:
+        valid_dates = valid_dates[valid_dates > score_after]
+    valid_dates = list(valid_dates)
+    print(f"Valid dates for rolling: {len(valid_dates)}")
+
+    for current_date in valid_dates:
+        # Lag 2 days to avoid Lookahead Bias
+        train_end = current_date - pd.Timedelta(days=2)
+        train_start = current_date - pd.Timedelta(days=window_size_days + 10)
+        df_train = date_slice(df_signals, train_start, train_end)
+        if len(df_train) < 5:
+            continue
+        current_row = df_signals.loc[[current_date]]
+
+        if selector is not None:
+            selector.update(outcomes, current_date)
+            ml_filter.train_path(df_train, selector.Cs)
+            path_probs = ml_filter.predict_path_probs(current_row)
+            choice = selector.choose()
+            prob = path_probs[0, choice] if len(path_probs) > 0 else 0.5
+            if len(path_probs) > 0:
+                selector.record(current_date, path_probs[0])
+                path_report.append({'Date': current_date, 'C': selector.Cs[choice], 'ml_prob': prob,
+                                    **{f'prob_C={c:g}': p for c, p in zip(selector.Cs, path_probs[0])}})
+        else:
+            ml_filter.train(df_train)
+            probs = ml_filter.predict_probs(current_row)
+            prob = probs[0] if len(probs) > 0 else 0.5
+
+        experiment_signals.loc[current_date, 'ml_prob'] = prob
+        if prob < veto_threshold:
+            experiment_signals.loc[current_date, 'veto'] = True
+            experiment_signals.loc[current_date, 'Signal'] = 'FLAT'
+            experiment_signals.loc[current_date, 'direction'] = 0
+
+    return experiment_signals, selector, path_report
+
+
+def run_symbol_backtest(symbol, params=None, start_date=DATA_START, end_date=DATA_END,
+                        fyers_secrets_path=None):
+    """
+    Run the full pipeline for one symbol and parameter set.
+
+    Args:
+        symbol: Ticker, e.g. 'SONATSOFTW.NS'
+        params: Overrides for DEFAULT_PARAMS
+        start_date: Backtest start
+        end_date: Backtest end
+        fyers_secrets_path: Passed through to load_data
+
+    Returns:
+        Tuple of (stats_dict, trade_log_df, equity_curve_df) as run_backtest
+    """
+    from src.data.data_loader import load_data
+
+    p = dict(DEFAULT_PARAMS)
+    p.update(params or {})
+
+    df_full = load_data(symbol, start_date=start_date, end_date=end_date, fyers_secrets_path=fyers_secrets_path)
+    df = date_slice(df_full, start_date, end_date).copy()
+    df_features = FeatureEngineer().add_features(df)
+    exec_engine = ExecutionEngine(initial_capital=INITIAL_CAPITAL)
+    if df_features.empty:
+        return exec_engine._performance_stats(None, 0, 0), pd.DataFrame(), pd.DataFrame()
+
+    df_signals = SignalGenerator(threshold=1).generate_signals(df_features)
+    experiment_signals, _, _ = walk_forward_filter(
+        df_signals,
+        veto_threshold=p['veto_threshold'],
+        warmup_days=p['warmup_days'],
+        window_size_days=p['window_size_days'],
+        c_grid=p['c_grid']
+    )
+    exit_engine = ExitEngine(
+        stop_atr_mult=p['stop_atr_mult'],
+        target_atr_mult=p['target_atr_mult'],
+        trail_atr_mult=p['trail_atr_mult'],
+        max_hold_bars=p['hold_horizon']
+    )
+    return exec_engine.run_backtest(experiment_signals, hold_horizon_days=p['hold_horizon'], exit_engine=exit_engine)
@@ -0,0 +1,374 @@
+# Sharded execution module
+"""
+Sharded universe backtests over a simple TCP worker protocol.
+
+A ShardCoordinator holds (symbol, params) work units and listens for
+workers. Each worker connects, announces itself, and then repeatedly
+receives one unit, runs it and sends back the result, so faster workers
+naturally pull more units. When the queue is empty, idle workers steal by
+re-running the longest outstanding unit; whichever copy finishes first wins.
+Failed or disconnected units are retried up to max_retries times, and the
+per-unit stats, trade logs and equity curves are merged into one result
+alongside the units that never produced one.
+
+Messages are length-prefixed pickles. Pickle executes code on load, so only
+run coordinator and workers on a trusted network.
+
+Usage (one coordinator, workers on any machine that can reach it):
+    python -m src.backtest.sharding worker --host 10.0.0.5 --port 50555
+"""
+
+import argparse
+import collections
+import itertools
+import multiprocessing
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+import time
+import traceback
+
+import pandas as pd
+from src.utils.config import SHARD_HOST, SHARD_PORT, SHARD_MAX_RETRIES
+
+
+_HEADER = struct.Struct('!I')
+
+
+def _send_msg(sock, msg):
+    payload = pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            raise ConnectionError("connection closed")
+        got += k
+    return bytes(buf)
+
+
+def _recv_msg(sock):
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return pickle.loads(_recv_exact(sock, length))
+
+
+def param_key(params):
+    """Stable label for a parameter dict, e.g. 'hold_horizon=2,veto_threshold=0.45'."""
+    if not params:
+        return 'default'
+    return ','.join(f"{k}={params[k]}" for k in sorted(params))
+
+
+def make_units(symbols, param_grid=None):
+    """
+    Expand symbols x parameter grid into work units.
+
+    Args:
+        symbols: Iterable of tickers
+        param_grid: Dict of param name -> list of values (None for defaults)
+
+    Returns:
+        List of (symbol, params) tuples
+    """
+    if not param_grid:
+        combos = [{}]
+    else:
+        keys = sorted(param_grid)
+        combos = [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+    return [(symbol, params) for symbol in symbols for params in combos]
+
+
+class _CoordinatorHandler(socketserver.BaseRequestHandler):
+    """Serves work units to one connected worker."""
+
+    def handle(self):
+        coord = self.server.coordinator
+        worker = f"{self.client_address[0]}:{self.client_address[1]}"
+        current = None
+        try:
+            hello = _recv_msg(self.request)
+            worker = hello.get('worker') or worker
+            while True:
+                current = coord._next_unit(worker)
+                if current is None:
+                    _send_msg(self.request, {'type': 'stop'})
+                    return
+                symbol, params = coord.units[current]
+                _send_msg(self.request, {'type': 'task', 'unit_id': current, 'symbol': symbol, 'params': params})
+                try:
+                    reply = _recv_msg(self.request)
+                    if reply.get('type') == 'result':
+                        coord._complete(current, worker, reply)
+                    else:
+                        coord._fail(current, worker, reply.get('error', 'unknown error'))
+                except (ConnectionError, OSError, EOFError, struct.error):
+                    raise
+                except Exception as e:
+                    # The message was read in full, so the stream is still usable
+                    coord._fail(current, worker, f"bad reply from {worker}: {e!r}")
+                current = None
+        except Exception as e:
+            if current is not None:
+                coord._fail(current, worker, f"worker {worker} lost: {e!r}")
+
+
+class ShardCoordinator:
+    """Distributes work units to TCP workers and merges their results."""
+
+    def __init__(self, units, host=SHARD_HOST, port=SHARD_PORT, max_retries=SHARD_MAX_RETRIES):
+        """
+        Args:
+            units: List of (symbol, params) tuples, e.g. from make_units
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            max_retries: Extra attempts for a unit after a failure
+        """
+        self.units = dict(enumerate(units))
+        self.max_retries = max_retries
+        self.results = {}
+        self.failed = {}
+        self.failures = collections.Counter()
+        self.steals = 0
+        self._queue = collections.deque(self.units)
+        self._in_flight = {}  # unit_id -> {worker: start time}
+        self._cond = threading.Condition()
+
+        self._server = socketserver.ThreadingTCPServer((host, port), _CoordinatorHandler, bind_and_activate=False)
+        self._server.allow_reuse_address = True
+        self._server.daemon_threads = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self._server.coordinator = self
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def _done(self):
+        return len(self.results) + len(self.failed) == len(self.units)
+
+    def _next_unit(self, worker):
+        """Block until there is a unit for this worker, or return None when finished."""
+        with self._cond:
+            while True:
+                if self._done():
+                    return None
+                if self._queue:
+                    uid = self._queue.popleft()
+                    break
+                # Steal: duplicate the longest-running unit held by one other worker
+                candidates = [(min(starts.values()), uid) for uid, starts in self._in_flight.items()
+                              if len(starts) == 1 and worker not in starts]
+                if candidates:
+                    uid = min(candidates)[1]
+                    self.steals += 1
+                    break
+                self._cond.wait(timeout=0.5)
+            self._in_flight.setdefault(uid, {})[worker] = time.monotonic()
+            return uid
+
+    def _complete(self, uid, worker, reply):
+        result = (reply['stats'], reply['trade_log'], reply['equity'])
+        with self._cond:
+            if uid not in self.results and uid not in self.failed:
+                self.results[uid] = result
+            self._in_flight.pop(uid, None)
+            self._cond.notify_all()
+
+    def _fail(self, uid, worker, error):
+        with self._cond:
+            starts = self._in_flight.get(uid, {})
+            starts.pop(worker, None)
+            if uid in self.results or uid in self.failed:
+                return
+            self.failures[uid] += 1
+            print(f"Shard {uid} {self.units[uid][0]} failed on {worker} "
+                  f"(attempt {self.failures[uid]}): {error}")
+            if starts:
+                return  # a stolen copy is still running
+            self._in_flight.pop(uid, None)
+            if self.failures[uid] <= self.max_retries:
+                self._queue.appendleft(uid)
+            else:
+                self.failed[uid] = error
+            self._cond.notify_all()
+
+    def run(self, timeout=None):
+        """
+        Serve workers until every unit has a result or has exhausted retries.
+
+        Args:
+            timeout: Seconds to wait before giving up (None waits forever);
+                     units still unfinished then are reported as failed
+
+        Returns:
+            Tuple of (stats_df, trade_log_df, equity_df, failed): the merged
+            results (see merge_results) and a dict of (symbol, param_key)
+            -> error for every unit without a result
+        """
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            with self._cond:
+                while not self._done():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        print(f"Sharded run timed out with {len(self.results)}/{len(self.units)} units finished.")
+                        for uid in self.units:
+                            if uid not in self.results and uid not in self.failed:
+                                self.failed[uid] = f"timed out after {timeout}s"
+                        self._cond.notify_all()
+                        break
+                    self._cond.wait(timeout=remaining if remaining is not None else 1.0)
+        finally:
+            # Give connected workers a moment to receive their stop message
+            time.sleep(0.1)
+            self._server.shutdown()
+            self._server.server_close()
+        if self.failed:
+            print(f"Sharded run finished with {len(self.failed)} failed units.")
+        failed = {(self.units[uid][0], param_key(self.units[uid][1])): error
+                  for uid, error in sorted(self.failed.items())}
+        return merge_results(self.units, self.results) + (failed,)
+
+
+def merge_results(units, results):
+    """
+    Combine per-unit backtest outputs.
+
+    Args:
+        units: Dict of unit_id -> (symbol, params)
+        results: Dict of unit_id -> (stats_dict, trade_log_df, equity_df)
+
+    Returns:
+        Tuple of (stats_df indexed by (Symbol, Params), trade_log_df with
+        Symbol/Params columns, equity_df with (Symbol, Params) columns)
+    """
+    stats, logs, curves = {}, [], {}
+    for uid in sorted(results):
+        symbol, params = units[uid]
+        key = (symbol, param_key(params))
+        unit_stats, trade_log, equity = results[uid]
+        stats[key] = unit_stats
+        if trade_log is not None and not trade_log.empty:
+            trade_log = trade_log.copy()
+            trade_log.insert(0, 'Params', key[1])
+            trade_log.insert(0, 'Symbol', symbol)
+            logs.append(trade_log)
+        if equity is not None and not equity.empty:
+            curves[key] = equity['Equity']
+
+    stats_df = pd.DataFrame.from_dict(stats, orient='index')
+    if not stats_df.empty:
+        stats_df.index = pd.MultiIndex.from_tuples(stats_df.index, names=['Symbol', 'Params'])
+    trade_log_df = pd.concat(logs, ignore_index=True) if logs else pd.DataFrame()
+    equity_df = pd.concat(curves, axis=1, names=['Symbol', 'Params']) if curves else pd.DataFrame()
+    return stats_df, trade_log_df, equity_df
+
+
+def run_worker(host=SHARD_HOST, port=SHARD_PORT, task_fn=None, name=None, connect_timeout=30.0):
+    """
+    Connect to a coordinator and process units until told to stop.
+
+    Args:
+        host: Coordinator host
+        port: Coordinator port
+        task_fn: Callable (symbol, params) -> (stats, trade_log, equity);
+                 defaults to pipeline.run_symbol_backtest
+        name: Worker label used in coordinator logs
+        connect_timeout: Seconds to keep retrying the initial connection
+    """
+    if task_fn is None:
+        from src.backtest.pipeline import run_symbol_backtest
+        task_fn = run_symbol_backtest
+
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    with sock:
+        _send_msg(sock, {'type': 'ready', 'worker': name or f"{socket.gethostname()}:{os.getpid()}"})
+        while True:
+            msg = _recv_msg(sock)
+            if msg.get('type') != 'task':
+                return
+            try:
+                stats, trade_log, equity = task_fn(msg['symbol'], msg['params'])
+                reply = {'type': 'result', 'unit_id': msg['unit_id'],
+                         'stats': stats, 'trade_log': trade_log, 'equity': equity}
+            except Exception:
+                reply = {'type': 'error', 'unit_id': msg['unit_id'], 'error': traceback.format_exc(limit=3)}
+            _send_msg(sock, reply)
+
+
+def spawn_local_workers(n, host, port, task_fn=None):
+    """Start n worker processes on this machine; returns the Process list."""
+    procs = []
+    for i in range(n):
+        proc = multiprocessing.Process(target=run_worker, args=(host, port, task_fn, f"local-{i}"), daemon=True)
+        proc.start()
+        procs.append(proc)
+    return procs
+
+
+def run_sharded(symbols, param_grid=None, n_local_workers=0, host=SHARD_HOST, port=SHARD_PORT,
+                task_fn=None, timeout=None):
+    """
+    Run a symbols x parameter grid backtest across TCP workers.
+
+    Args:
+        symbols: Tickers to backtest
+        param_grid: Dict of param name -> values (see pipeline.DEFAULT_PARAMS)
+        n_local_workers: Worker processes to start locally; remote workers
+                         may connect to (host, port) as well
+        host: Coordinator interface
+        port: Coordinator port (0 picks a free port)
+        task_fn: Work function for local workers
+        timeout: Overall time limit in seconds; partial results are
+                 returned when it expires
+
+    Returns:
+        Tuple of (stats_df, trade_log_df, equity_df, failed), where failed
+        maps (symbol, param_key) to the last error of each unit without a
+        result (see ShardCoordinator.run)
+    """
+    coordinator = ShardCoordinator(make_units(symbols, param_grid), host=host, port=port)
+    bound_host, bound_port = coordinator.address
+    print(f"Coordinator listening on {bound_host}:{bound_port} with {len(coordinator.units)} units")
+    procs = spawn_local_workers(n_local_workers, bound_host, bound_port, task_fn)
+    try:
+        return coordinator.run(timeout=timeout)
+    finally:
+        for proc in procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded backtest worker")
+    parser.add_argument('role', choices=['worker'])
+    parser.add_argument('--host', default=SHARD_HOST)
+    parser.add_argument('--port', type=int, default=SHARD_PORT)
+    parser.add_argument('--name', default=None)
+    args = parser.parse_args()
+    run_worker(args.host, args.port, name=args.name)
+
+
+if __name__ == "__main__":
+    main()
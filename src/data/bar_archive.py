@@ -0,0 +1,145 @@
+# Bar archive module
+"""
+Memory-mapped historical bar store.
+
+Each symbol is kept as one structured .npy file whose records hold a sorted
+int64 timestamp (epoch nanoseconds) and a float64 (5,) OHLCV row, so the
+index and the prices are always replaced together. Files are opened with
+mmap_mode='r', so a range query is two binary searches followed by a
+zero-copy slice of the mapped fields; nothing is parsed or materialized
+until the data is actually touched.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class BarArchive:
+    """Per-symbol OHLCV archive backed by memory-mapped NumPy files."""
+
+    COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+    DTYPE = np.dtype([('ts', '<i8'), ('ohlcv', '<f8', (5,))])
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._maps = {}
+
+    def _path(self, symbol):
+        return os.path.join(self.root, f"{symbol}.bars.npy")
+
+    def symbols(self):
+        """List the symbols stored in the archive."""
+        return sorted(f[:-len('.bars.npy')] for f in os.listdir(self.root) if f.endswith('.bars.npy'))
+
+    def __contains__(self, symbol):
+        return os.path.exists(self._path(symbol))
+
+    def write(self, symbol, df):
+        """
+        Store a symbol's full history, replacing any existing data.
+
+        Args:
+            symbol: Ticker, e.g. 'SONATSOFTW.NS'
+            df: DataFrame with Date index and OHLCV columns
+        """
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        ts = pd.DatetimeIndex(df.index).as_unit('ns').asi8.astype(np.int64)
+        values = np.ascontiguousarray(df[self.COLUMNS].to_numpy(dtype=np.float64))
+        self._save(symbol, ts, values)
+
+    def append(self, symbol, df):
+        """
+        Add bars newer than the last stored timestamp.
+
+        Rows at or before the archive's last bar are ignored.
+        """
+        if symbol not in self:
+            self.write(symbol, df)
+            return
+        ts_old, values_old = self._open(symbol)
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        ts_new = pd.DatetimeIndex(df.index).as_unit('ns').asi8.astype(np.int64)
+        keep = ts_new > ts_old[-1] if len(ts_old) else np.ones(len(ts_new), dtype=bool)
+        if not keep.any():
+            return
+        values_new = df[self.COLUMNS].to_numpy(dtype=np.float64)[keep]
+        self._save(symbol, np.concatenate([ts_old, ts_new[keep]]),
+                   np.concatenate([values_old, values_new]))
+
+    def _save(self, symbol, ts, values):
+        """Write the symbol's file atomically and drop any cached mapping."""
+        self._maps.pop(symbol, None)
+        records = np.empty(len(ts), dtype=self.DTYPE)
+        records['ts'] = ts
+        records['ohlcv'] = values
+        path = self._path(symbol)
+        tmp = path + '.tmp.npy'
+        np.save(tmp, records)
+        os.replace(tmp, path)
+
+    def _open(self, symbol):
+        """Return the (ts, values) memory-mapped field views for a symbol, cached."""
+        if symbol not in self._maps:
+            path = self._path(symbol)
+            if not os.path.exists(path):
+                raise KeyError(f"{symbol} not in archive {self.root}")
+            records = np.load(path, mmap_mode='r')
+            self._maps[symbol] = (records['ts'], records['ohlcv'])
+        return self._maps[symbol]
+
+    def window(self, symbol, start=None, end=None):
+        """
+        Zero-copy views of the bars with start <= date <= end.
+
+        Returns:
+            Tuple of (ts int64 view, values float64 (n, 5) view)
+        """
+        ts, values = self._open(symbol)
+        lo = np.searchsorted(ts, pd.Timestamp(start).as_unit('ns').value, side='left') if start is not None else 0
+        hi = np.searchsorted(ts, pd.Timestamp(end).as_unit('ns').value, side='right') if end is not None else len(ts)
+        hi = max(lo, hi)
+        return ts[lo:hi], values[lo:hi]
+
+    def load(self, symbol, start=None, end=None):
+        """
+        Load a date window as a DataFrame backed by the mapped arrays.
+
+        Returns:
+            pd.DataFrame with Date index and OHLCV columns (read-only data)
+        """
+        ts, values = self.window(symbol, start, end)
+        index = pd.DatetimeIndex(np.asarray(ts).view('M8[ns]'), name='Date')
+        return pd.DataFrame(np.asarray(values), index=index, columns=self.COLUMNS, copy=False)
+
+
+def build_archive(root, tickers, start_date, end_date, fyers_secrets_path=None):
+    """
+    Populate an archive by downloading each ticker once via load_data.
+
+    Args:
+        root: Archive directory
+        tickers: Iterable of symbols
+        start_date: Start of history to fetch
+        end_date: End of history to fetch
+        fyers_secrets_path: Passed through to load_data
+
+    Returns:
+        BarArchive over root
+    """
+    from src.data.data_loader import load_data
+
+    archive = BarArchive(root)
+    for ticker in tickers:
+        try:
+            df = load_data(ticker, start_date, end_date, fyers_secrets_path=fyers_secrets_path, archive_root=None)
+        except Exception as e:
+            print(f"Archive: failed to load {ticker} ({e}), skipping.")
+            continue
+        if df is None or df.empty:
+            print(f"Archive: no data for {ticker}, skipping.")
+            continue
+        archive.append(ticker, df)
+    return archive
@@ -6,19 +6,26 @@ in fyers_secrets.json to use fyers to backtest
 """
 
 import os
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from src.utils.config import BAR_ARCHIVE_DIR
 
 
-def load_data(ticker, start_date, end_date, fyers_secrets_path=None):
+def load_data(ticker, start_date, end_date, fyers_secrets_path=None, archive_root=BAR_ARCHIVE_DIR):
     """
     Load historical OHLCV data for the given ticker.
     
-    Attempts Fyers API first, falls back to yfinance.
+    Attempts Fyers API first, falls back to yfinance. With archive_root set,
+    bars are served from a memory-mapped BarArchive and only bars newer than
+    its last one are downloaded.
     
     Returns:
         pd.DataFrame with Date index and OHLCV columns.
     """
+    if archive_root:
+        return _load_archived(ticker, start_date, end_date, fyers_secrets_path, archive_root)
+    
     df = pd.DataFrame()
     
     # Try Fyers API first
@@ -53,3 +60,44 @@ def load_data(ticker, start_date, end_date, fyers_secrets_path=None):
     print(f"Downloaded {len(df)} rows total")
     return df
 
+
+def _load_archived(ticker, start_date, end_date, fyers_secrets_path, archive_root):
+    """
+    Read-through archive lookup for load_data.
+    
+    Missing or stale symbols are topped up from the usual sources first:
+    bars after the archive's last bar are appended, and when the window
+    has weekdays before the archive's first bar, that range is backfilled
+    and the symbol rewritten. A window starting on a market holiday costs
+    one small redundant download.
+    """
+    from src.data.bar_archive import BarArchive
+    
+    archive = BarArchive(archive_root)
+    fetch_from = start_date
+    if ticker in archive:
+        ts, _ = archive.window(ticker)
+        if len(ts):
+            first_bar, last_bar = pd.Timestamp(int(ts[0])), pd.Timestamp(int(ts[-1]))
+            if np.busday_count(pd.Timestamp(start_date).date(), first_bar.date()) > 0:
+                older = load_data(ticker, start_date, first_bar.strftime('%Y-%m-%d'),
+                                  fyers_secrets_path=fyers_secrets_path, archive_root=None)
+                older = older[older.index < first_bar] if older is not None and not older.empty else None
+                if older is not None and not older.empty:
+                    archive.write(ticker, pd.concat([older, archive.load(ticker)]))
+            if last_bar >= pd.Timestamp(end_date) - pd.Timedelta(days=1):
+                fetch_from = None
+            else:
+                fetch_from = last_bar.strftime('%Y-%m-%d')
+    
+    if fetch_from is not None:
+        fresh = load_data(ticker, fetch_from, end_date, fyers_secrets_path=fyers_secrets_path, archive_root=None)
+        if fresh is not None and not fresh.empty:
+            archive.append(ticker, fresh)
+    
+    if ticker not in archive:
+        return pd.DataFrame()
+    df = archive.load(ticker, start_date, end_date)
+    print(f"Archive: {len(df)} rows for {ticker}")
+    return df
+
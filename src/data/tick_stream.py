@@ -0,0 +1,405 @@
+# Tick ingestion module
+"""
+Live tick ingestion and OHLCV bar aggregation.
+
+Ticks arrive as packed binary records over a broker-style streaming socket
+(subscribe message first, then a continuous stream of fixed-size frames).
+Each batch is decoded straight into a NumPy view, written into preallocated
+per-symbol ring buffers and folded into bars with vectorized reductions, so
+no Python object is created per tick. TickReplayServer stands in for the
+broker feed when running locally.
+"""
+
+import json
+import socket
+import socketserver
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from src.utils.config import TICK_BUFFER_CAPACITY, BAR_BUFFER_CAPACITY, BAR_RESOLUTION_SECONDS, BAR_CLOSE_DELAY_MS
+
+
+# Wire format: one record per tick, little-endian, no padding
+TICK_DTYPE = np.dtype([
+    ('symbol_id', '<i4'),
+    ('ts', '<i8'),        # epoch milliseconds
+    ('price', '<f8'),
+    ('volume', '<f8'),
+])
+
+BAR_DTYPE = np.dtype([
+    ('ts', '<i8'),        # bar open time, epoch milliseconds
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+
+class BarAggregator:
+    """Buffers ticks per symbol and aggregates them into fixed-resolution bars."""
+
+    def __init__(self, symbols, resolution_seconds=BAR_RESOLUTION_SECONDS,
+                 tick_capacity=TICK_BUFFER_CAPACITY, bar_capacity=BAR_BUFFER_CAPACITY, tracer=None):
+        """
+        Args:
+            symbols: List of symbols; position in the list is the wire symbol_id
+            resolution_seconds: Bar length in seconds
+            tick_capacity: Recent ticks retained per symbol (oldest overwritten)
+            bar_capacity: Completed bars held per symbol until drained
+            tracer: Optional LatencyTracer; each completed bar starts a trace
+                    keyed by its drain_bars timestamp
+        """
+        self.symbols = list(symbols)
+        self.symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+        self.resolution_ms = int(resolution_seconds * 1000)
+        n = len(self.symbols)
+
+        # Tick ring buffers: the last tick_capacity ticks per symbol
+        self.tick_capacity = tick_capacity
+        self.tick_ts = np.zeros((n, tick_capacity), dtype=np.int64)
+        self.tick_price = np.zeros((n, tick_capacity), dtype=np.float64)
+        self.tick_volume = np.zeros((n, tick_capacity), dtype=np.float64)
+        self.tick_head = np.zeros(n, dtype=np.int64)
+        self.tick_count = np.zeros(n, dtype=np.int64)
+
+        # Completed bars waiting for hand-off
+        self.bar_capacity = bar_capacity
+        self.bars = np.zeros((n, bar_capacity), dtype=BAR_DTYPE)
+        self.bar_head = np.zeros(n, dtype=np.int64)
+        self.bar_count = np.zeros(n, dtype=np.int64)
+
+        # Bar currently being built for each symbol (ts == -1 means none)
+        self.open_bar = np.zeros(n, dtype=BAR_DTYPE)
+        self.open_bar['ts'] = -1
+        # First bucket still accepting ticks once a bar was closed by the clock
+        self.min_bucket = np.full(n, -1, dtype=np.int64)
+
+        self.late_ticks = 0
+        self.dropped_bars = 0
+        self.tracer = tracer
+
+    def on_ticks(self, ticks):
+        """
+        Ingest a batch of ticks.
+
+        Args:
+            ticks: Structured array with TICK_DTYPE fields (any order)
+        """
+        if len(ticks) == 0:
+            return
+        order = np.lexsort((ticks['ts'], ticks['symbol_id']))
+        sym = ticks['symbol_id'][order]
+        ts = ticks['ts'][order]
+        price = ticks['price'][order]
+        volume = ticks['volume'][order]
+
+        # One pass per symbol present in the batch, never per tick
+        starts = np.flatnonzero(np.r_[True, sym[1:] != sym[:-1]])
+        ends = np.r_[starts[1:], len(sym)]
+        for lo, hi in zip(starts, ends):
+            sid = int(sym[lo])
+            if sid < 0 or sid >= len(self.symbols):
+                continue
+            self._ingest_symbol(sid, ts[lo:hi], price[lo:hi], volume[lo:hi])
+
+    def _ingest_symbol(self, sid, ts, price, volume):
+        """Write one symbol's ticks into its ring and fold them into bars."""
+        buckets = ts // self.resolution_ms
+        current = self.open_bar[sid]['ts']
+        floor = current // self.resolution_ms if current >= 0 else self.min_bucket[sid]
+        if floor >= 0:
+            keep = buckets >= floor
+            if not keep.all():
+                self.late_ticks += int((~keep).sum())
+                ts, price, volume, buckets = ts[keep], price[keep], volume[keep], buckets[keep]
+                if len(ts) == 0:
+                    return
+
+        self._write_ticks(sid, ts, price, volume)
+
+        # Partial bars for every bucket touched by this batch
+        bounds = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        partial = np.empty(len(bounds), dtype=BAR_DTYPE)
+        partial['ts'] = buckets[bounds] * self.resolution_ms
+        partial['open'] = price[bounds]
+        partial['high'] = np.maximum.reduceat(price, bounds)
+        partial['low'] = np.minimum.reduceat(price, bounds)
+        partial['close'] = price[np.r_[bounds[1:], len(price)] - 1]
+        partial['volume'] = np.add.reduceat(volume, bounds)
+
+        # Merge the first partial bar into the bar already in progress
+        bar = self.open_bar[sid:sid + 1].copy()
+        if bar['ts'][0] >= 0:
+            if partial['ts'][0] == bar['ts'][0]:
+                partial['open'][0] = bar['open'][0]
+                partial['high'][0] = max(partial['high'][0], bar['high'][0])
+                partial['low'][0] = min(partial['low'][0], bar['low'][0])
+                partial['volume'][0] += bar['volume'][0]
+            else:
+                self._push_bars(sid, bar)
+
+        # All but the last bucket are complete; the last stays open
+        if len(partial) > 1:
+            self._push_bars(sid, partial[:-1])
+        self.open_bar[sid] = partial[-1]
+
+    def _write_ticks(self, sid, ts, price, volume):
+        """Copy ticks into the symbol's ring buffer, overwriting the oldest."""
+        cap = self.tick_capacity
+        if len(ts) > cap:
+            ts, price, volume = ts[-cap:], price[-cap:], volume[-cap:]
+        n = len(ts)
+        head = int(self.tick_head[sid])
+        first = min(n, cap - head)
+        self.tick_ts[sid, head:head + first] = ts[:first]
+        self.tick_price[sid, head:head + first] = price[:first]
+        self.tick_volume[sid, head:head + first] = volume[:first]
+        if first < n:
+            self.tick_ts[sid, :n - first] = ts[first:]
+            self.tick_price[sid, :n - first] = price[first:]
+            self.tick_volume[sid, :n - first] = volume[first:]
+        self.tick_head[sid] = (head + n) % cap
+        self.tick_count[sid] = min(cap, self.tick_count[sid] + n)
+
+    def _push_bars(self, sid, new_bars):
+        """Append completed bars to the symbol's bar ring."""
+        if self.tracer is not None:
+            t = self.tracer.clock()
+            for ts in new_bars['ts']:
+                self.tracer.mark(self.symbols[sid], pd.Timestamp(int(ts), unit='ms'), 'data_received', t_ns=t)
+        cap = self.bar_capacity
+        n = len(new_bars)
+        if n > cap:
+            self.dropped_bars += n - cap
+            new_bars = new_bars[-cap:]
+            n = cap
+        # Bounded memory: the oldest undrained bars are overwritten
+        overflow = max(0, int(self.bar_count[sid]) + n - cap)
+        if overflow:
+            self.dropped_bars += overflow
+            self.bar_head[sid] = (self.bar_head[sid] + overflow) % cap
+            self.bar_count[sid] -= overflow
+        tail = int((self.bar_head[sid] + self.bar_count[sid]) % cap)
+        first = min(n, cap - tail)
+        self.bars[sid, tail:tail + first] = new_bars[:first]
+        if first < n:
+            self.bars[sid, :n - first] = new_bars[first:]
+        self.bar_count[sid] += n
+
+    def close_due(self, now_ms):
+        """
+        Close open bars whose interval has ended, without waiting for the
+        symbol's next tick (illiquid symbols would otherwise hand off late).
+
+        Ticks arriving afterwards for a closed bar are counted as late.
+
+        Args:
+            now_ms: Current time in epoch milliseconds on the feed's clock
+
+        Returns:
+            Number of bars closed
+        """
+        open_ts = self.open_bar['ts']
+        due = np.flatnonzero((open_ts >= 0) & (open_ts + self.resolution_ms <= now_ms))
+        for sid in due:
+            self._push_bars(sid, self.open_bar[sid:sid + 1].copy())
+        self.min_bucket[due] = open_ts[due] // self.resolution_ms + 1
+        open_ts[due] = -1
+        return len(due)
+
+    def flush(self):
+        """Close every open bar (e.g. at end of session)."""
+        for sid in np.flatnonzero(self.open_bar['ts'] >= 0):
+            self._push_bars(sid, self.open_bar[sid:sid + 1].copy())
+            self.min_bucket[sid] = self.open_bar[sid]['ts'] // self.resolution_ms + 1
+        self.open_bar['ts'] = -1
+
+    def recent_ticks(self, symbol):
+        """Return (ts, price, volume) of the buffered ticks, oldest first."""
+        sid = self.symbol_ids[symbol]
+        n = int(self.tick_count[sid])
+        idx = (int(self.tick_head[sid]) - n + np.arange(n)) % self.tick_capacity
+        return self.tick_ts[sid, idx], self.tick_price[sid, idx], self.tick_volume[sid, idx]
+
+    def drain_bars(self, symbol):
+        """
+        Hand off completed bars for a symbol and clear them from the buffer.
+
+        Returns:
+            pd.DataFrame with Date index and OHLCV columns, in the same
+            layout as FyersBridge.fetch_historical_data.
+        """
+        sid = self.symbol_ids[symbol]
+        n = int(self.bar_count[sid])
+        idx = (int(self.bar_head[sid]) + np.arange(n)) % self.bar_capacity
+        bars = self.bars[sid, idx]
+        self.bar_head[sid] = (int(self.bar_head[sid]) + n) % self.bar_capacity
+        self.bar_count[sid] = 0
+
+        df = pd.DataFrame({
+            'Open': bars['open'],
+            'High': bars['high'],
+            'Low': bars['low'],
+            'Close': bars['close'],
+            'Volume': bars['volume'],
+        }, index=pd.to_datetime(bars['ts'], unit='ms'))
+        df.index.name = 'Date'
+        return df
+
+
+class TickStreamClient:
+    """Consumes a binary tick stream and feeds it into a BarAggregator."""
+
+    def __init__(self, host, port, aggregator, batch_ticks=4096, close_delay_ms=BAR_CLOSE_DELAY_MS,
+                 poll_interval=0.25):
+        """
+        Args:
+            host: Feed host
+            port: Feed port
+            aggregator: BarAggregator receiving the ticks
+            batch_ticks: Receive buffer size in ticks
+            close_delay_ms: Grace period for late ticks before a bar whose
+                            interval has ended is closed
+            poll_interval: Seconds to wait for data before checking for due
+                           bars on a quiet feed
+        """
+        self.host = host
+        self.port = port
+        self.aggregator = aggregator
+        self.close_delay_ms = close_delay_ms
+        self.poll_interval = poll_interval
+        # Feed clock: newest tick time, advanced by wall time since it arrived
+        self._feed_ms = None
+        self._feed_wall = None
+        self.itemsize = TICK_DTYPE.itemsize
+        # Receive buffer reused for every read
+        self._buf = bytearray(batch_ticks * self.itemsize)
+        self._view = memoryview(self._buf)
+        self.ticks_received = 0
+
+    def feed_now_ms(self):
+        """Current time on the feed's clock, or None before the first tick."""
+        if self._feed_ms is None:
+            return None
+        return self._feed_ms + int((time.monotonic() - self._feed_wall) * 1000)
+
+    def run(self, on_batch=None):
+        """
+        Subscribe to the aggregator's symbols and consume until the feed closes.
+
+        After every read (or poll_interval of silence), bars whose interval
+        ended more than close_delay_ms ago on the feed clock are closed.
+
+        Args:
+            on_batch: Optional callback invoked after each ingested batch or
+                      clock-driven bar close
+        """
+        with socket.create_connection((self.host, self.port)) as sock:
+            sub = {'type': 'subscribe', 'symbols': self.aggregator.symbols}
+            sock.sendall((json.dumps(sub) + '\n').encode())
+            sock.settimeout(self.poll_interval)
+
+            pending = 0  # bytes of an incomplete record carried over
+            while True:
+                try:
+                    n = sock.recv_into(self._view[pending:])
+                except socket.timeout:
+                    n = None
+                if n == 0:
+                    break
+                ingested = False
+                if n:
+                    filled = pending + n
+                    whole = filled - filled % self.itemsize
+                    if whole:
+                        ticks = np.frombuffer(self._buf, dtype=TICK_DTYPE, count=whole // self.itemsize)
+                        self.aggregator.on_ticks(ticks)
+                        self.ticks_received += len(ticks)
+                        newest = int(ticks['ts'].max())
+                        if self._feed_ms is None or newest > self._feed_ms:
+                            self._feed_ms, self._feed_wall = newest, time.monotonic()
+                        ingested = True
+                    pending = filled - whole
+                    if pending:
+                        self._buf[:pending] = self._buf[whole:filled]
+
+                now = self.feed_now_ms()
+                closed = self.aggregator.close_due(now - self.close_delay_ms) if now is not None else 0
+                if (ingested or closed) and on_batch is not None:
+                    on_batch(self.aggregator)
+
+
+class _ReplayHandler(socketserver.StreamRequestHandler):
+    """Streams recorded ticks to one subscriber."""
+
+    def handle(self):
+        try:
+            sub = json.loads(self.rfile.readline().decode())
+        except ValueError:
+            return
+        frames = self.server.replay.encode(sub.get('symbols', []))
+        chunk = self.server.replay.chunk_ticks * TICK_DTYPE.itemsize
+        delay = self.server.replay.chunk_delay
+        payload = memoryview(frames.tobytes())
+        for start in range(0, len(payload), chunk):
+            self.wfile.write(payload[start:start + chunk])
+            if delay:
+                time.sleep(delay)
+
+
+class TickReplayServer:
+    """Local stand-in for the broker tick socket, replaying recorded ticks."""
+
+    def __init__(self, ticks, host='127.0.0.1', port=0, chunk_ticks=1000, chunk_delay=0.0):
+        """
+        Args:
+            ticks: Dict of symbol -> DataFrame with DatetimeIndex and
+                   'Price' and 'Volume' columns
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            chunk_ticks: Ticks per socket write
+            chunk_delay: Seconds to sleep between writes (throttles the replay)
+        """
+        self.ticks = ticks
+        self.chunk_ticks = chunk_ticks
+        self.chunk_delay = chunk_delay
+        self._server = socketserver.ThreadingTCPServer((host, port), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.replay = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def encode(self, symbols):
+        """Build the time-ordered wire frames for a subscription."""
+        parts = []
+        for sid, symbol in enumerate(symbols):
+            df = self.ticks.get(symbol)
+            if df is None or df.empty:
+                continue
+            rec = np.empty(len(df), dtype=TICK_DTYPE)
+            rec['symbol_id'] = sid
+            rec['ts'] = pd.DatetimeIndex(df.index).as_unit('ms').asi8
+            rec['price'] = df['Price'].to_numpy(dtype=np.float64)
+            rec['volume'] = df['Volume'].to_numpy(dtype=np.float64)
+            parts.append(rec)
+        if not parts:
+            return np.empty(0, dtype=TICK_DTYPE)
+        frames = np.concatenate(parts)
+        return frames[np.argsort(frames['ts'], kind='stable')]
+
+    def start(self):
+        """Serve in a background thread and return the bound (host, port)."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.address
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
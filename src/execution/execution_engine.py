@@ -5,7 +5,7 @@ Trade execution and backtesting logic.
 
 import pandas as pd
 import numpy as np
-from src.utils.config import RISK_PER_TRADE_PCT
+from src.utils.config import RISK_PER_TRADE_PCT, STOP_ATR_MULT
 
 
 class ExecutionEngine:
@@ -14,36 +14,117 @@ class ExecutionEngine:
     def __init__(self, initial_capital):
         self.initial_capital = initial_capital
     
-    def run_backtest(self, df_signals, hold_horizon_days=1):
+    def run_backtest(self, df_signals, hold_horizon_days=1, exit_engine=None):
         """
         Run backtest on signals with Next-Open execution.
         
         Args:
             df_signals: DataFrame with Signal column
             hold_horizon_days: Number of days to hold each trade
+            exit_engine: Optional ExitEngine; when given, stop-loss, target and
+                         trailing exits are checked against the High/Low path,
+                         the time exit defaults to hold_horizon_days and
+                         positions are sized on its risk_atr_mult
             
         Returns:
             Tuple of (stats_dict, trade_log_df, equity_curve_df)
         """
-        capital = self.initial_capital
-        position = 0
-        entry_price = 0
-        days_held = 0
-        position_qty = 0
-        equity_curve = []
-        trades = []
+        state = self.step_backtest(df_signals, self.new_state(), hold_horizon_days, exit_engine)
+        return self.backtest_results(state)
+    
+    def new_state(self):
+        """Empty backtest state: flat, with the initial capital."""
+        return {
+            'capital': self.initial_capital,
+            'position': 0,
+            'entry_price': 0,
+            'days_held': 0,
+            'position_qty': 0,
+            'entry_bar': None,      # date of the bar whose open filled the entry
+            'entry_atr': np.nan,
+            'last_date': None,      # last signal row processed
+            'equity_curve': [],
+            'trades': []
+        }
+    
+    def step_backtest(self, df_signals, state, hold_horizon_days=1, exit_engine=None):
+        """
+        Advance a backtest state over the rows after state['last_date'].
+        
+        A row is processed once the next bar's Open is known, so the last row
+        of df_signals stays pending until a later call. Feeding the same bars
+        in several calls gives the same state as one call over all of them,
+        provided df_signals still contains the open trade's entry bar.
+        
+        Args:
+            df_signals: DataFrame with Signal column
+            state: Dict from new_state() or a previous step_backtest call
+            hold_horizon_days: Number of days to hold each trade
+            exit_engine: Optional ExitEngine (see run_backtest)
+            
+        Returns:
+            The updated state dict
+        """
+        capital = state['capital']
+        position = state['position']
+        entry_price = state['entry_price']
+        days_held = state['days_held']
+        position_qty = state['position_qty']
+        entry_bar = state['entry_bar']
+        entry_atr = state['entry_atr']
+        last_date = state['last_date']
+        equity_curve = list(state['equity_curve'])
+        trades = list(state['trades'])
+        risk_atr_mult = exit_engine.risk_atr_mult if exit_engine is not None else STOP_ATR_MULT
         
         # Prepare execution data: need 'Open' of NEXT day for signal execution
         df = df_signals.copy()
         df['NextOpen'] = df['Open'].shift(-1)
+        bar_pos = np.flatnonzero(df['NextOpen'].notna())
         df = df.dropna(subset=['NextOpen'])
         
-        for date, row in df.iterrows():
+        if exit_engine is not None:
+            path_open = df_signals['Open'].to_numpy(dtype=np.float64)
+            path_high = df_signals['High'].to_numpy(dtype=np.float64)
+            path_low = df_signals['Low'].to_numpy(dtype=np.float64)
+            max_hold = exit_engine.max_hold_bars if exit_engine.max_hold_bars is not None else hold_horizon_days
+            
+            def resolve_exit(entry_pos):
+                # Exit along the bars available so far; -1 row means still open
+                exit_idx, exit_price, reason, at_open = exit_engine.evaluate(
+                    path_open, path_high, path_low, entry_pos, position, entry_price, entry_atr,
+                    max_hold_bars=max_hold)
+                row_pos = exit_idx[0] - int(at_open[0]) if exit_idx[0] >= 0 else -1
+                return row_pos, exit_price[0], reason[0]
+            
+            exit_row_pos = -1
+            if position != 0:
+                exit_row_pos, exit_px, exit_reason = resolve_exit(df_signals.index.get_loc(entry_bar))
+        
+        for r, (date, row) in enumerate(df.iterrows()):
+            if last_date is not None and date <= last_date:
+                continue
             current_signal = row['Signal']
             exec_price = row['NextOpen']  # Price we will trade at (Tomorrow's Open)
+            last_date = date
             
             # 1. Update Equity and Check Exits
-            if position != 0:
+            if position != 0 and exit_engine is not None:
+                # Exit resolved at entry: intrabar exits are booked on the
+                # exit bar, opening-price exits on the bar before it
+                if exit_row_pos >= 0 and bar_pos[r] >= exit_row_pos:
+                    pnl = (exit_px - entry_price) * position_qty * position
+                    capital += pnl
+                    trades.append({
+                        'Date': date,
+                        'Type': 'EXIT',
+                        'Price': exit_px,
+                        'PnL': pnl,
+                        'Reason': exit_reason
+                    })
+                    position = 0
+                    days_held = 0
+            elif position != 0:
                 days_held += 1
                 
                 # Exit after holding period
@@ -69,7 +150,7 @@ class ExecutionEngine:
                 if atr <= 0 or np.isnan(atr):
                     continue
                 
-                stop_distance = 1.2 * atr
+                stop_distance = risk_atr_mult * atr
                 calc_qty = int(risk_per_trade / stop_distance)
                 
                 if calc_qty <= 0:
@@ -79,11 +160,16 @@ class ExecutionEngine:
                 entry_price = exec_price
                 position_qty = calc_qty
                 days_held = 0
+                entry_bar = df_signals.index[bar_pos[r] + 1]
+                entry_atr = atr
                 trades.append({
                     'Date': date,
                     'Type': current_signal,
                     'Price': exec_price
                 })
+                
+                if exit_engine is not None:
+                    exit_row_pos, exit_px, exit_reason = resolve_exit(bar_pos[r] + 1)
             
             # Record equity
             curr_equity = capital
@@ -92,9 +178,140 @@ class ExecutionEngine:
                 curr_equity = capital + (row['Close'] - entry_price) * qty * position
             equity_curve.append({'Date': date, 'Equity': curr_equity})
         
-        # Calculate performance metrics
-        df_equity = pd.DataFrame(equity_curve).set_index('Date')
+        return {
+            'capital': capital,
+            'position': position,
+            'entry_price': entry_price,
+            'days_held': days_held,
+            'position_qty': position_qty,
+            'entry_bar': entry_bar,
+            'entry_atr': entry_atr,
+            'last_date': last_date,
+            'equity_curve': equity_curve,
+            'trades': trades
+        }
+    
+    def backtest_results(self, state):
+        """
+        Performance metrics, trade log and equity curve for a backtest state.
+        
+        Returns:
+            Tuple of (stats_dict, trade_log_df, equity_curve_df)
+        """
+        equity_curve = state['equity_curve']
+        trades = state['trades']
+        df_equity = pd.DataFrame(equity_curve).set_index('Date') if equity_curve else pd.DataFrame()
         if df_equity.empty:
+            return self._performance_stats(None, 0, 0), pd.DataFrame(), pd.DataFrame()
+        
+        exits = [t for t in trades if t['Type'] == 'EXIT']
+        wins = len([t for t in exits if t['PnL'] > 0])
+        return self._performance_stats(df_equity['Equity'], len(exits), wins), pd.DataFrame(trades), df_equity
+    
+    def run_batch_backtest(self, df_features, directions, hold_horizon_days=1, exit_engine=None):
+        """
+        Backtest many strategies side by side with the run_backtest rules.
+        
+        Steps through dates once and updates every strategy's position,
+        capital and equity with array operations, so a grid of variants
+        costs roughly the same as a single backtest.
+        
+        Args:
+            df_features: DataFrame with Open, High, Low, Close and ATR columns
+            directions: DataFrame of int8 directions (dates x strategies),
+                        e.g. from SignalMatrix.compute
+            hold_horizon_days: Number of days to hold each trade
+            exit_engine: Optional ExitEngine (see run_backtest); the exits of
+                         all strategies entering on a date are resolved in
+                         one evaluate call
+            
+        Returns:
+            Tuple of (stats_df indexed by strategy, equity_df dates x strategies)
+        """
+        df = df_features.copy()
+        df['NextOpen'] = df['Open'].shift(-1)
+        bar_pos = np.flatnonzero(df['NextOpen'].notna())
+        df = df.dropna(subset=['NextOpen'])
+        
+        dirs = directions.reindex(df.index).fillna(0).to_numpy(dtype=np.int8)
+        next_open = df['NextOpen'].to_numpy(dtype=np.float64)
+        close = df['Close'].to_numpy(dtype=np.float64)
+        atr = df['ATR'].to_numpy(dtype=np.float64) if 'ATR' in df else np.full(len(df), np.nan)
+        
+        n_dates, n_strats = dirs.shape
+        capital = np.full(n_strats, float(self.initial_capital))
+        position = np.zeros(n_strats, dtype=np.int64)
+        entry_price = np.zeros(n_strats)
+        position_qty = np.zeros(n_strats, dtype=np.int64)
+        days_held = np.zeros(n_strats, dtype=np.int64)
+        n_exits = np.zeros(n_strats, dtype=np.int64)
+        n_wins = np.zeros(n_strats, dtype=np.int64)
+        equity = np.full((n_dates, n_strats), np.nan)
+        
+        risk_atr_mult = STOP_ATR_MULT
+        if exit_engine is not None:
+            risk_atr_mult = exit_engine.risk_atr_mult
+            path_open = df_features['Open'].to_numpy(dtype=np.float64)
+            path_high = df_features['High'].to_numpy(dtype=np.float64)
+            path_low = df_features['Low'].to_numpy(dtype=np.float64)
+            max_hold = exit_engine.max_hold_bars if exit_engine.max_hold_bars is not None else hold_horizon_days
+            exit_row = np.full(n_strats, -1, dtype=np.int64)   # row that books the exit, -1 if none
+            exit_px = np.zeros(n_strats)
+        
+        for t in range(n_dates):
+            exec_price = next_open[t]
+            
+            # 1. Exits: resolved at entry by the exit engine, else after the holding period
+            in_pos = position != 0
+            if exit_engine is not None:
+                exiting = in_pos & (exit_row >= 0) & (bar_pos[t] >= exit_row)
+                pnl = (exit_px - entry_price) * position_qty * position
+            else:
+                days_held[in_pos] += 1
+                exiting = in_pos & (days_held >= hold_horizon_days)
+                pnl = (exec_price - entry_price) * position_qty * position
+            capital = np.where(exiting, capital + pnl, capital)
+            n_exits += exiting
+            n_wins += exiting & (pnl > 0)
+            position[exiting] = 0
+            days_held[exiting] = 0
+            
+            # 2. Entries (if flat) with ATR position sizing
+            want = (position == 0) & (dirs[t] != 0)
+            if atr[t] <= 0 or np.isnan(atr[t]):
+                skipped = want
+            else:
+                calc_qty = (RISK_PER_TRADE_PCT * capital / (risk_atr_mult * atr[t])).astype(np.int64)
+                skipped = want & (calc_qty <= 0)
+                enter = want & ~skipped
+                position[enter] = dirs[t][enter]
+                entry_price[enter] = exec_price
+                position_qty[enter] = calc_qty[enter]
+                days_held[enter] = 0
+                
+                if exit_engine is not None and enter.any():
+                    k = int(enter.sum())
+                    x_idx, x_price, _, at_open = exit_engine.evaluate(
+                        path_open, path_high, path_low, np.full(k, bar_pos[t] + 1), position[enter],
+                        np.full(k, exec_price), np.full(k, atr[t]), max_hold_bars=max_hold)
+                    exit_row[enter] = np.where(x_idx >= 0, x_idx - at_open, -1)
+                    exit_px[enter] = x_price
+            
+            # Record equity (skipped entries record nothing, as in run_backtest)
+            curr_equity = capital + np.where(position != 0, (close[t] - entry_price) * position_qty * position, 0.0)
+            curr_equity[skipped] = np.nan
+            equity[t] = curr_equity
+        
+        df_equity = pd.DataFrame(equity, index=df.index, columns=directions.columns)
+        stats = {
+            name: self._performance_stats(df_equity[name].dropna(), int(n_exits[i]), int(n_wins[i]))
+            for i, name in enumerate(df_equity.columns)
+        }
+        return pd.DataFrame.from_dict(stats, orient='index'), df_equity
+    
+    def _performance_stats(self, equity, n_exits, n_wins):
+        """Summary metrics from an equity series and closed-trade counts."""
+        if equity is None or equity.empty:
             return {
                 'Total PnL': 0,
                 'Return %': 0,
@@ -102,24 +319,22 @@ class ExecutionEngine:
                 'Max Drawdown': 0,
                 'Total Trades': 0,
                 'Win Rate': 0
-            }, pd.DataFrame(), pd.DataFrame()
+            }
         
-        total_return = df_equity['Equity'].iloc[-1] - self.initial_capital
+        total_return = equity.iloc[-1] - self.initial_capital
         ret_pct = (total_return / self.initial_capital) * 100
-        daily_rets = df_equity['Equity'].pct_change()
+        daily_rets = equity.pct_change()
         sharpe = daily_rets.mean() / daily_rets.std() * np.sqrt(252) if daily_rets.std() != 0 else 0
-        cum_max = df_equity['Equity'].cummax()
-        dd = (df_equity['Equity'] - cum_max) / cum_max
+        cum_max = equity.cummax()
+        dd = (equity - cum_max) / cum_max
         max_dd = dd.min() * 100
-        exits = [t for t in trades if t['Type'] == 'EXIT']
-        wins = len([t for t in exits if t['PnL'] > 0])
-        win_rate = (wins / len(exits) * 100) if exits else 0
+        win_rate = (n_wins / n_exits * 100) if n_exits else 0
         
         return {
             'Total PnL': total_return,
             'Return %': ret_pct,
             'Sharpe Ratio': sharpe,
             'Max Drawdown': max_dd,
-            'Total Trades': len(exits),
+            'Total Trades': n_exits,
             'Win Rate': win_rate
-        }, pd.DataFrame(trades), df_equity
+        }
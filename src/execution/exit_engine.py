@@ -0,0 +1,184 @@
+# Exit engine module
+"""
+Vectorized trade exits: stop-loss, profit target, trailing stop and time.
+
+Exits are resolved for many trades at once by gathering each trade's OHLC
+path into a (trades x bars) matrix and taking the first bar where a level is
+touched, rather than checking bars one by one in Python. Paths are scanned
+in fixed-width blocks so memory stays bounded on long or intraday histories.
+"""
+
+import numpy as np
+from src.utils.config import STOP_ATR_MULT, EXIT_SAME_BAR, UNSTOPPED_RISK_ATR_MULT
+
+
+# Reason codes returned by ExitEngine.evaluate
+EXIT_REASONS = np.array(['', 'STOP', 'TARGET', 'TRAIL', 'TIME'])
+_NONE, _STOP, _TARGET, _TRAIL, _TIME = range(5)
+
+
+class ExitEngine:
+    """Finds the first exit of each trade along its OHLC path."""
+
+    def __init__(self, stop_atr_mult=STOP_ATR_MULT, target_atr_mult=None, trail_atr_mult=None,
+                 max_hold_bars=None, same_bar=EXIT_SAME_BAR, block_bars=64):
+        """
+        Args:
+            stop_atr_mult: Stop distance from entry in ATRs (None disables)
+            target_atr_mult: Profit target distance in ATRs (None disables)
+            trail_atr_mult: Trailing stop distance from the best price seen
+                            on prior bars, in ATRs (None disables)
+            max_hold_bars: Exit at the open this many bars after entry (None disables)
+            same_bar: 'stop' or 'target' - which level wins when both are
+                      touched inside the same bar and the open decides neither
+            block_bars: Bars scanned per vectorized step
+        """
+        if same_bar not in ('stop', 'target'):
+            raise ValueError(f"same_bar must be 'stop' or 'target', got {same_bar!r}")
+        self.stop_atr_mult = stop_atr_mult
+        self.target_atr_mult = target_atr_mult
+        self.trail_atr_mult = trail_atr_mult
+        self.max_hold_bars = max_hold_bars
+        self.same_bar = same_bar
+        self.block_bars = block_bars
+
+    @property
+    def risk_atr_mult(self):
+        """
+        Risk distance for position sizing, in ATRs.
+
+        This is the nearest protective level at entry: the stop, or the
+        trailing stop, which starts trail_atr_mult from the entry price.
+        With neither enabled the loss is unbounded, so positions are sized
+        against UNSTOPPED_RISK_ATR_MULT as a notional risk unit.
+        """
+        mults = [m for m in (self.stop_atr_mult, self.trail_atr_mult) if m]
+        return min(mults) if mults else UNSTOPPED_RISK_ATR_MULT
+
+    def levels(self, direction, entry_price, atr):
+        """
+        Initial stop and target prices for a trade (NaN when disabled).
+
+        The stop is the nearer of the fixed stop and the trailing stop's
+        starting level, which is what protects the trade on its entry bar.
+        """
+        mults = [m for m in (self.stop_atr_mult, self.trail_atr_mult) if m]
+        stop = entry_price - direction * min(mults) * atr if mults else np.nan
+        target = entry_price + direction * self.target_atr_mult * atr if self.target_atr_mult else np.nan
+        return stop, target
+
+    def evaluate(self, open_, high, low, entry_idx, direction, entry_price, atr, max_hold_bars=None):
+        """
+        Resolve exits for a batch of trades entered at the open of entry_idx.
+
+        Rules, applied per bar from the entry bar onwards:
+        - An open beyond the stop/trail or target fills at the open (gap)
+        - Otherwise a touched level fills at the level
+        - If both stop/trail and target are touched inside one bar, same_bar decides
+        - The trailing level uses the best price of prior bars only
+        - With no touch, the trade exits at the open max_hold_bars after entry
+
+        Args:
+            open_, high, low: 1-D price arrays for the instrument
+            entry_idx: Bar index of each entry (filled at that bar's open)
+            direction: 1 for long, -1 for short
+            entry_price: Fill price of each entry
+            atr: ATR at entry, used to size the levels
+            max_hold_bars: Overrides the engine's time exit
+
+        Returns:
+            Tuple of (exit_idx, exit_price, reason, at_open) arrays. exit_idx is
+            -1 and reason '' for trades still open at the end of the data;
+            at_open marks exits filled at the opening price of exit_idx.
+        """
+        open_ = np.asarray(open_, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        entry_idx = np.atleast_1d(np.asarray(entry_idx, dtype=np.int64))
+        direction = np.atleast_1d(np.asarray(direction, dtype=np.float64))
+        entry_price = np.atleast_1d(np.asarray(entry_price, dtype=np.float64))
+        atr = np.atleast_1d(np.asarray(atr, dtype=np.float64))
+        max_hold = max_hold_bars if max_hold_bars is not None else self.max_hold_bars
+
+        n_bars, n = len(open_), len(entry_idx)
+        exit_idx = np.full(n, -1, dtype=np.int64)
+        exit_price = np.full(n, np.nan)
+        codes = np.full(n, _NONE, dtype=np.int8)
+        at_open = np.zeros(n, dtype=bool)
+
+        # Work in signed prices (price * direction) so longs and shorts share
+        # one rule set: higher is always better for the position.
+        s_entry = direction * entry_price
+        s_stop = s_entry - self.stop_atr_mult * atr if self.stop_atr_mult else np.full(n, -np.inf)
+        s_target = s_entry + self.target_atr_mult * atr if self.target_atr_mult else np.full(n, np.inf)
+        trail_dist = self.trail_atr_mult * atr if self.trail_atr_mult else None
+        best = s_entry.copy()
+
+        horizon = max_hold if max_hold is not None else n_bars
+        pending = np.arange(n)
+        for offset in range(0, horizon, self.block_bars):
+            if pending.size == 0:
+                break
+            cols = offset + np.arange(min(self.block_bars, horizon - offset))
+            idx = entry_idx[pending, None] + cols[None, :]
+            valid = idx < n_bars
+            if not valid.any():
+                break
+            idx = np.minimum(idx, n_bars - 1)
+            d = direction[pending, None]
+            adverse = np.where(d > 0, low[idx], high[idx]) * d
+            favorable = np.where(d > 0, high[idx], low[idx]) * d
+            opens = open_[idx] * d
+
+            protect = np.broadcast_to(s_stop[pending, None], idx.shape)
+            protect_code = np.full(idx.shape, _STOP, dtype=np.int8)
+            if trail_dist is not None:
+                prior_best = np.maximum.accumulate(
+                    np.concatenate([best[pending, None], favorable[:, :-1]], axis=1), axis=1)
+                trail = prior_best - trail_dist[pending, None]
+                use_trail = trail > protect
+                protect = np.where(use_trail, trail, protect)
+                protect_code = np.where(use_trail, _TRAIL, protect_code).astype(np.int8)
+            target = s_target[pending, None]
+
+            protect_hit = (adverse <= protect) & valid
+            target_hit = (favorable >= target) & valid
+            hit = protect_hit | target_hit
+            resolved = hit.any(axis=1)
+
+            rows = np.flatnonzero(resolved)
+            if rows.size:
+                k = hit[rows].argmax(axis=1)
+                trades = pending[rows]
+                o = opens[rows, k]
+                p = protect[rows, k]
+                t = target[rows, 0]
+                p_hit = protect_hit[rows, k]
+                t_hit = target_hit[rows, k]
+                # The open trades first, so a gap decides before same_bar does
+                gap_protect = p_hit & (o <= p)
+                gap_target = t_hit & (o >= t)
+                prefer_target = self.same_bar == 'target'
+                take_target = gap_target | (t_hit & ~gap_protect & (~p_hit | prefer_target))
+
+                exit_idx[trades] = entry_idx[trades] + offset + k
+                signed = np.where(take_target, np.maximum(t, o), np.minimum(p, o))
+                exit_price[trades] = signed * direction[trades]
+                codes[trades] = np.where(take_target, _TARGET, protect_code[rows, k])
+                at_open[trades] = np.where(take_target, gap_target, gap_protect)
+
+            if trail_dist is not None:
+                best[pending] = np.maximum(best[pending], np.where(valid, favorable, -np.inf).max(axis=1))
+            pending = pending[~resolved]
+
+        # Time exit at the open after the holding period
+        if max_hold is not None and pending.size:
+            t_idx = entry_idx[pending] + max_hold
+            ok = t_idx < n_bars
+            trades = pending[ok]
+            exit_idx[trades] = t_idx[ok]
+            exit_price[trades] = open_[t_idx[ok]]
+            codes[trades] = _TIME
+            at_open[trades] = True
+
+        return exit_idx, exit_price, EXIT_REASONS[codes], at_open
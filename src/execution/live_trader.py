@@ -0,0 +1,117 @@
+# Live trading module
+"""
+Bar-by-bar live execution path.
+
+LiveTrader takes each completed bar handed off by the tick aggregator
+through features, signal, ML probability and ATR sizing, and returns the
+entry order the strategy would open from flat. With a LatencyTracer
+attached, every stage is timestamped per symbol and bar.
+
+It never places orders itself: it holds no positions and applies none of
+the stop, target, trail or holding-period exits of step_backtest, so
+orders sent from here would not follow the backtested strategy. A caller
+that does manage positions can send the intent with
+FyersBridge.place_order(..., trace_key=intent['bar']) on a bridge sharing
+the tracer, which completes the trace with order_sent / broker_ack; any
+other caller should end it with tracer.close(symbol, bar).
+"""
+
+import numpy as np
+import pandas as pd
+from src.utils.config import (
+    INITIAL_CAPITAL, ML_VETO_THRESHOLD, RISK_PER_TRADE_PCT, STOP_ATR_MULT, FEATURE_WARMUP_BARS
+)
+from src.features.feature_engineer import FeatureEngineer
+from src.signals.signal_generator import SignalGenerator
+
+
+class LiveTrader:
+    """Turns completed bars into entry order intents, one symbol at a time."""
+
+    def __init__(self, ml_filter, capital=INITIAL_CAPITAL, veto_threshold=ML_VETO_THRESHOLD,
+                 tracer=None, history_bars=FEATURE_WARMUP_BARS, exit_engine=None):
+        """
+        Args:
+            ml_filter: Trained MLFilter
+            capital: Capital used for ATR position sizing
+            veto_threshold: Minimum P(up) to act on a signal
+            tracer: Optional LatencyTracer
+            history_bars: Recent bars kept per symbol for indicator warm-up
+            exit_engine: ExitEngine whose risk_atr_mult sizes positions, to
+                         match the backtest (STOP_ATR_MULT if None)
+        """
+        self.ml_filter = ml_filter
+        self.capital = capital
+        self.veto_threshold = veto_threshold
+        self.tracer = tracer
+        self.history_bars = history_bars
+        self.risk_atr_mult = exit_engine.risk_atr_mult if exit_engine is not None else STOP_ATR_MULT
+        self.feature_engineer = FeatureEngineer()
+        self.signal_generator = SignalGenerator(threshold=1)
+        self.history = {}
+
+    def _mark(self, symbol, bar_ts, stage):
+        if self.tracer is not None:
+            self.tracer.mark(symbol, bar_ts, stage)
+
+    def _skip(self, symbol, bar_ts):
+        if self.tracer is not None:
+            self.tracer.close(symbol, bar_ts)
+        return None
+
+    def on_bars(self, symbol, new_bars):
+        """
+        Append newly completed bars and act on the latest one.
+
+        Latency percentiles are exported here, once the bar is fully handled,
+        so export I/O never falls inside a traced stage.
+
+        Args:
+            symbol: Ticker
+            new_bars: OHLCV DataFrame, e.g. from BarAggregator.drain_bars
+
+        Returns:
+            Dict with symbol, side (1/-1), qty and bar for an entry the
+            strategy would take from flat, else None. Its trace is left open
+            for the caller (see the module docstring).
+        """
+        response = self._handle_bars(symbol, new_bars)
+        if self.tracer is not None:
+            self.tracer.maybe_export()
+        return response
+
+    def _handle_bars(self, symbol, new_bars):
+        if new_bars.empty:
+            return None
+        history = self.history.get(symbol)
+        history = new_bars if history is None else pd.concat([history, new_bars])
+        self.history[symbol] = history = history.iloc[-self.history_bars:]
+
+        # Only the newest bar trades; older bars in the batch are already stale
+        bar_ts = new_bars.index[-1]
+        for ts in new_bars.index[:-1]:
+            self._skip(symbol, ts)
+
+        features = self.feature_engineer.add_features(history)
+        self._mark(symbol, bar_ts, 'features_updated')
+        if features.empty or features.index[-1] != bar_ts:
+            return self._skip(symbol, bar_ts)
+
+        row = self.signal_generator.generate_signals(features.iloc[[-1]])
+        self._mark(symbol, bar_ts, 'signal')
+        direction = int(row['direction'].iloc[0])
+        if direction == 0:
+            return self._skip(symbol, bar_ts)
+
+        prob = self.ml_filter.predict_probs(row)[0]
+        self._mark(symbol, bar_ts, 'ml_prob')
+        if prob < self.veto_threshold:
+            return self._skip(symbol, bar_ts)
+
+        atr = row['ATR'].iloc[0]
+        qty = int(RISK_PER_TRADE_PCT * self.capital / (self.risk_atr_mult * atr)) if atr > 0 and not np.isnan(atr) else 0
+        self._mark(symbol, bar_ts, 'sizing')
+        if qty <= 0:
+            return self._skip(symbol, bar_ts)
+
+        return {'symbol': symbol, 'side': direction, 'qty': qty, 'bar': bar_ts}
@@ -9,21 +9,103 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.multiclass import OneVsRestClassifier
 
 
+def _sma_diff(close, sma):
+    """Relative distance of Close from SMA_20 (Series or arrays)."""
+    return (close - sma) / sma
+
+
+# Features computed from frame columns: name -> (function, input columns)
+_DERIVED_FEATURES = {
+    'SMA_Diff': (_sma_diff, ('Close', 'SMA_20')),
+}
+
+
+def _up_probability(scores, classes):
+    """
+    Probability of the 1.0 class from one-vs-rest sigmoid scores.
+    
+    Mirrors OneVsRestClassifier.predict_proba: two classes share a single
+    estimator for classes[1]; with more, per-class scores are normalized.
+    
+    Args:
+        scores: Array (..., n_estimators) of positive-class probabilities
+        classes: Sorted class labels
+        
+    Returns:
+        Array (...) of P(class == 1.0), 0.5 when 1.0 was never seen
+    """
+    classes = list(classes)
+    if 1.0 not in classes:
+        return np.full(scores.shape[:-1], 0.5)
+    col = classes.index(1.0)
+    if len(classes) == 2:
+        p = scores[..., 0]
+        return p if col == 1 else 1 - p
+    return scores[..., col] / scores.sum(axis=-1)
+
+
+class LogisticKernel:
+    """
+    Fitted one-vs-rest logistic model reduced to plain coefficient arrays.
+    
+    Scoring is a single matrix product and sigmoid in NumPy, with none of
+    the DataFrame or estimator dispatch overhead of predict_proba.
+    """
+    
+    def __init__(self, coef, intercept, classes):
+        """
+        Args:
+            coef: Array (n_estimators, n_features)
+            intercept: Array (n_estimators,)
+            classes: Sorted class labels of the fitted model
+        """
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes = np.asarray(classes, dtype=np.float64)
+    
+    @classmethod
+    def from_model(cls, model):
+        """Export a fitted OneVsRestClassifier of LogisticRegression estimators."""
+        coef = np.vstack([est.coef_ for est in model.estimators_])
+        intercept = np.concatenate([est.intercept_ for est in model.estimators_])
+        return cls(coef, intercept, model.classes_)
+    
+    def predict_up(self, X):
+        """P(class == 1.0) for each row of a (n, n_features) array."""
+        z = X @ self.coef.T + self.intercept
+        return _up_probability(1.0 / (1.0 + np.exp(-z)), self.classes)
+
+
 class MLFilter:
     """Rolling Logistic Regression filter to veto low-probability trades."""
     
-    def __init__(self, lookback_window=20):
+    FEATURES = ['RSI', 'ATR', 'SMA_Diff', 'BB_Std']
+    PATH_SOLVER = 'lbfgs'  # solver of train_path; unlike liblinear it leaves the intercept unpenalized
+    
+    def __init__(self, lookback_window=20, C=0.1, solver='liblinear'):
+        """
+        Args:
+            lookback_window: Rolling training window length
+            C: Inverse regularization strength
+            solver: LogisticRegression solver; use PATH_SOLVER when C was
+                    chosen by train_path, so the same C gives the same model
+        """
         self.lookback_window = lookback_window
         self.model = OneVsRestClassifier(
             LogisticRegression(
                 penalty='l2',
-                C=0.1,
-                solver='liblinear',
+                C=C,
+                solver=solver,
                 max_iter=1000,
                 random_state=42
             )
         )
         self.is_trained = False
+        self.kernel = None
+        self.path_Cs = None
+        self.path_coef = None
+        self.path_intercept = None
+        self.path_classes = None
     
     def train(self, df):
         """Train the model on historical data."""
@@ -31,8 +113,39 @@ class MLFilter:
         if len(X) >= 5 and len(y.unique()) > 1:
             self.model.fit(X, y)
             self.is_trained = True
+            self.kernel = self._export_kernel()
         else:
             self.is_trained = False
+            self.kernel = None
+    
+    def _export_kernel(self):
+        """
+        Build the NumPy scoring kernel, or None to keep scoring on sklearn.
+        
+        Agreement with predict_proba is covered by tests/test_logistic_filter.py
+        rather than checked on every fit.
+        """
+        try:
+            return LogisticKernel.from_model(self.model)
+        except (AttributeError, ValueError) as e:
+            print(f"Kernel export skipped ({e}); using predict_proba.")
+        return None
+    
+    def _up_probs(self, df):
+        """P(up) for rows of df with complete features, and their index."""
+        if self.kernel is not None:
+            X, valid = self._feature_matrix(df)
+            return self.kernel.predict_up(X[valid]), df.index[valid]
+        
+        X, _ = self._prepare_data(df, training=False)
+        common_idx = df.index.intersection(X.index)
+        if common_idx.empty:
+            return np.empty(0), common_idx
+        probs_all = self.model.predict_proba(X.loc[common_idx])
+        classes = list(self.model.classes_)
+        if 1.0 in classes:
+            return probs_all[:, classes.index(1.0)], common_idx
+        return np.full(len(common_idx), 0.5), common_idx
     
     def apply_veto(self, df, threshold=0.55):
         """Apply ML veto to signals below probability threshold."""
@@ -41,29 +154,15 @@ class MLFilter:
             return df
         
         try:
-            X, _ = self._prepare_data(df, training=False)
-            common_idx = df.index.intersection(X.index)
+            probs, common_idx = self._up_probs(df)
             if common_idx.empty:
                 return df
             
-            probs_all = self.model.predict_proba(X.loc[common_idx])
-            classes = list(self.model.classes_)
-            
-            if 1.0 in classes:
-                col_idx = classes.index(1.0)
-                probs = probs_all[:, col_idx]
-            else:
-                probs = np.full(len(common_idx), 0.5)
-            
-            for i, date in enumerate(common_idx):
-                sig = df.loc[date, 'direction']
-                prob = probs[i]
-                if sig == 1 and prob < threshold:
-                    df.loc[date, 'Signal'] = 'FLAT'
-                    df.loc[date, 'direction'] = 0
-                if sig == -1 and prob > (1 - threshold):
-                    df.loc[date, 'Signal'] = 'FLAT'
-                    df.loc[date, 'direction'] = 0
+            sig = df.loc[common_idx, 'direction'].to_numpy()
+            veto = ((sig == 1) & (probs < threshold)) | ((sig == -1) & (probs > (1 - threshold)))
+            vetoed = common_idx[veto]
+            df.loc[vetoed, 'Signal'] = 'FLAT'
+            df.loc[vetoed, 'direction'] = 0
         except Exception as e:
             print(f"Veto error (safe): {e}")
         
@@ -75,29 +174,94 @@ class MLFilter:
             return [0.5] * len(df)
         
         try:
-            X, _ = self._prepare_data(df, training=False)
-            common_idx = df.index.intersection(X.index)
+            probs, common_idx = self._up_probs(df)
             if common_idx.empty:
                 return [0.5] * len(df)
-            
-            probs_all = self.model.predict_proba(X.loc[common_idx])
-            classes = list(self.model.classes_)
-            if 1.0 in classes:
-                col_idx = classes.index(1.0)
-                return list(probs_all[:, col_idx])
-            else:
-                return [0.5] * len(common_idx)
+            return list(probs)
         except Exception as e:
             print(f"Predict error (safe): {e}")
             return [0.5] * len(df)
     
+    def train_path(self, df, Cs):
+        """
+        Fit the model along a regularization path of C values.
+        
+        Each C is fitted with lbfgs warm-started from the solution of the
+        next smaller C, so the whole path costs a small multiple of one fit.
+        Coefficients for every C are kept for predict_path_probs.
+        
+        Args:
+            df: Training DataFrame (same columns as train)
+            Cs: Inverse regularization strengths to evaluate
+        """
+        self.path_Cs = np.sort(np.asarray(Cs, dtype=np.float64))
+        X, y = self._prepare_data(df)
+        if len(X) < 5 or len(y.unique()) <= 1:
+            self.path_coef = None
+            return
+        
+        X = X.to_numpy(dtype=np.float64)
+        y = y.to_numpy()
+        classes = np.unique(y)
+        # One binary problem per class, or one for classes[1] when binary
+        targets = classes[1:] if len(classes) == 2 else classes
+        coef = np.zeros((len(self.path_Cs), len(targets), X.shape[1]))
+        intercept = np.zeros((len(self.path_Cs), len(targets)))
+        
+        for t, cls in enumerate(targets):
+            est = LogisticRegression(solver=self.PATH_SOLVER, max_iter=1000, warm_start=True)
+            y_bin = (y == cls).astype(int)
+            for i, C in enumerate(self.path_Cs):
+                est.set_params(C=C)
+                est.fit(X, y_bin)
+                coef[i, t] = est.coef_[0]
+                intercept[i, t] = est.intercept_[0]
+        
+        self.path_coef = coef
+        self.path_intercept = intercept
+        self.path_classes = classes
+    
+    def predict_path_probs(self, df):
+        """
+        Return P(up) for every row and every C on the fitted path.
+        
+        Returns:
+            Array (n_rows, n_Cs); rows with missing features are dropped
+            as in predict_probs, and all values are 0.5 if untrained
+        """
+        X, valid = self._feature_matrix(df)
+        X = X[valid]
+        n_Cs = len(self.path_Cs) if self.path_Cs is not None else 1
+        if self.path_coef is None:
+            return np.full((len(X), n_Cs), 0.5)
+        
+        z = np.einsum('nf,ctf->nct', X, self.path_coef) + self.path_intercept
+        return _up_probability(1.0 / (1.0 + np.exp(-z)), self.path_classes)
+    
+    def _feature_matrix(self, df):
+        """
+        Feature array in FEATURES order, built without copying the frame.
+        
+        Returns:
+            Tuple of (X array (n, len(FEATURES)), mask of rows with no missing feature)
+        """
+        columns = []
+        for name in self.FEATURES:
+            if name in _DERIVED_FEATURES:
+                fn, inputs = _DERIVED_FEATURES[name]
+                columns.append(fn(*(df[c].to_numpy(dtype=np.float64) for c in inputs)))
+            else:
+                columns.append(df[name].to_numpy(dtype=np.float64))
+        X = np.column_stack(columns)
+        return X, ~np.isnan(X).any(axis=1)
+    
     def _prepare_data(self, df, training=True):
         """Prepare features and target for ML model."""
         df = df.copy()
         df['Target'] = np.sign(df['Close'].shift(-1) - df['Close'])
-        df['SMA_Diff'] = (df['Close'] - df['SMA_20']) / df['SMA_20']
-        features = ['RSI', 'ATR', 'SMA_Diff', 'BB_Std']
-        data = df[features].dropna()
+        for name, (fn, inputs) in _DERIVED_FEATURES.items():
+            df[name] = fn(*(df[c] for c in inputs))
+        data = df[self.FEATURES].dropna()
         
         if training:
             y = df['Target'].loc[data.index].dropna()
@@ -105,3 +269,47 @@ class MLFilter:
             return data.loc[common], y.loc[common]
         else:
             return data, None
+
+
+class PathSelector:
+    """
+    Chooses a regularization strength during the walk-forward pass.
+    
+    Every candidate's prediction for a date is scored by log-loss once that
+    date's next-day outcome is known; the candidate with the lowest
+    cumulative loss so far is used for the next date.
+    """
+    
+    def __init__(self, Cs, default_C=0.1):
+        self.Cs = np.sort(np.asarray(Cs, dtype=np.float64))
+        self.default_idx = int(np.argmin(np.abs(self.Cs - default_C)))
+        self.cum_loss = np.zeros(len(self.Cs))
+        self.n_scored = 0
+        self._pending = {}
+    
+    def choose(self):
+        """Index into Cs of the current best candidate."""
+        if self.n_scored == 0:
+            return self.default_idx
+        return int(np.argmin(self.cum_loss))
+    
+    def record(self, date, probs):
+        """Store each candidate's P(up) for a date until its outcome is known."""
+        self._pending[date] = np.asarray(probs, dtype=np.float64)
+    
+    def update(self, outcomes, as_of):
+        """
+        Score pending predictions whose outcome is known before as_of.
+        
+        Args:
+            outcomes: Series of next-day direction (sign of Close change) by date
+            as_of: Current walk-forward date
+        """
+        for date in [d for d in self._pending if d < as_of]:
+            outcome = outcomes.get(date, np.nan)
+            probs = self._pending.pop(date)
+            if pd.isna(outcome):
+                continue
+            p = np.clip(probs, 1e-6, 1 - 1e-6)
+            self.cum_loss += -np.log(p) if outcome == 1.0 else -np.log(1 - p)
+            self.n_scored += 1
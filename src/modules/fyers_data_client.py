@@ -7,9 +7,10 @@ from fyers_apiv3 import fyersModel
 import pyotp
 
 class FyersBridge:
-    def __init__(self, secrets_path='fyers_secrets.json'):
+    def __init__(self, secrets_path='fyers_secrets.json', tracer=None):
         self.secrets_path = secrets_path
         self.fyers = None
+        self.tracer = tracer  # optional LatencyTracer for order_sent / broker_ack
         self.secrets = self._load_secrets()
         
     def _load_secrets(self):
@@ -151,13 +152,18 @@ class FyersBridge:
             print(f"Data Fetch Error: {e}")
             return pd.DataFrame()
 
-    def place_order(self, symbol, qty, side, order_type="MARKET", product="CNCS"):
+    def place_order(self, symbol, qty, side, order_type="MARKET", product="CNCS", trace_key=None):
         """
         Place order via FYERS.
         side: 1 (Buy), -1 (Sell)
+        trace_key: bar timestamp the order belongs to; with a tracer set,
+                   the send and the broker's reply are timestamped for it
         """
+        traced = self.tracer is not None and trace_key is not None
         if not self.fyers:
             print("Error: FYERS Client not initialized.")
+            if traced:
+                self.tracer.close(symbol, trace_key)
             return None
 
         try:
@@ -178,10 +184,16 @@ class FyersBridge:
                 "offlineOrder": False,
             }
 
+            if traced:
+                self.tracer.mark(symbol, trace_key, 'order_sent')
             response = self.fyers.place_order(data=data)
+            if traced:
+                self.tracer.mark(symbol, trace_key, 'broker_ack')
             print(f"FYERS Order Response: {response}")
             return response
 
         except Exception as e:
             print(f"Order Placement Error: {e}")
+            if traced:
+                self.tracer.close(symbol, trace_key)
             return None
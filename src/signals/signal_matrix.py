@@ -0,0 +1,136 @@
+# Signal matrix module
+"""
+Vectorized evaluation of many parameterized rule variants at once.
+
+Every variant reads from one shared feature set: rolling statistics are
+computed once per distinct window and each rule is a broadcast comparison
+over all variants, giving a (dates x strategies) int8 direction matrix.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+class SignalMatrix:
+    """Builds a direction matrix for a list of rule variants."""
+
+    def __init__(self, strategies):
+        """
+        Args:
+            strategies: List of rule specs. Supported rules:
+                {'rule': 'sma_rsi', 'sma_window': 20, 'rsi_upper': 70, 'rsi_lower': 30}
+                {'rule': 'bollinger', 'bb_window': 20, 'num_std': 2.0}
+                An optional 'name' overrides the generated column name.
+        """
+        self.strategies = [dict(s) for s in strategies]
+        for spec in self.strategies:
+            if spec.get('rule') not in ('sma_rsi', 'bollinger'):
+                raise ValueError(f"Unknown rule: {spec.get('rule')}")
+            spec.setdefault('name', self._default_name(spec))
+
+    @staticmethod
+    def _default_name(spec):
+        if spec['rule'] == 'sma_rsi':
+            return f"SMA{spec['sma_window']}_RSI{spec['rsi_lower']}-{spec['rsi_upper']}"
+        return f"BB{spec['bb_window']}x{spec['num_std']}"
+
+    @classmethod
+    def grid(cls, sma_windows=(20,), rsi_bands=((30, 70),), bb_windows=(), bb_stds=()):
+        """
+        Build the cartesian product of rule parameters.
+
+        Args:
+            sma_windows: SMA lengths for the SMA/RSI rule
+            rsi_bands: (lower, upper) RSI bounds for the SMA/RSI rule
+            bb_windows: Bollinger lookbacks for the breakout rule
+            bb_stds: Band widths in standard deviations
+
+        Returns:
+            SignalMatrix over every combination
+        """
+        specs = [
+            {'rule': 'sma_rsi', 'sma_window': w, 'rsi_lower': lo, 'rsi_upper': hi}
+            for w, (lo, hi) in itertools.product(sma_windows, rsi_bands)
+        ]
+        specs += [
+            {'rule': 'bollinger', 'bb_window': w, 'num_std': k}
+            for w, k in itertools.product(bb_windows, bb_stds)
+        ]
+        return cls(specs)
+
+    @property
+    def names(self):
+        return [s['name'] for s in self.strategies]
+
+    def compute(self, df, history=None):
+        """
+        Evaluate every variant in one vectorized step.
+
+        Rules:
+        - sma_rsi LONG: Close > SMA_w AND RSI < upper; SHORT: Close < SMA_w AND RSI > lower
+        - bollinger LONG: Close > Mid_w + k*Std_w; SHORT: Close < Mid_w - k*Std_w
+
+        Args:
+            df: DataFrame with Close and RSI columns (FeatureEngineer output)
+            history: Optional raw OHLCV the features were built from; rolling
+                     windows are computed on it so variants are not cut short
+                     by the feature warm-up rows
+
+        Returns:
+            DataFrame of int8 directions (1, -1, 0), dates x strategies
+        """
+        source = history['Close'] if history is not None else df['Close']
+        close = df['Close'].to_numpy(dtype=np.float64)
+        rsi = df['RSI'].to_numpy(dtype=np.float64)
+        out = np.zeros((len(df), len(self.strategies)), dtype=np.int8)
+
+        # Shared rolling statistics: one pass per distinct window
+        windows = sorted({s['sma_window'] for s in self.strategies if s['rule'] == 'sma_rsi'} |
+                         {s['bb_window'] for s in self.strategies if s['rule'] == 'bollinger'})
+        rolling = {w: source.rolling(w) for w in windows}
+        means = {w: r.mean().reindex(df.index).to_numpy(dtype=np.float64) for w, r in rolling.items()}
+        std_windows = {s['bb_window'] for s in self.strategies if s['rule'] == 'bollinger'}
+        stds = {w: rolling[w].std().reindex(df.index).to_numpy(dtype=np.float64) for w in std_windows}
+
+        sma_cols = [i for i, s in enumerate(self.strategies) if s['rule'] == 'sma_rsi']
+        if sma_cols:
+            specs = [self.strategies[i] for i in sma_cols]
+            sma = np.column_stack([means[s['sma_window']] for s in specs])
+            upper = np.array([s['rsi_upper'] for s in specs], dtype=np.float64)
+            lower = np.array([s['rsi_lower'] for s in specs], dtype=np.float64)
+            long_cond = (close[:, None] > sma) & (rsi[:, None] < upper)
+            short_cond = (close[:, None] < sma) & (rsi[:, None] > lower)
+            out[:, sma_cols] = long_cond.astype(np.int8) - short_cond.astype(np.int8)
+
+        bb_cols = [i for i, s in enumerate(self.strategies) if s['rule'] == 'bollinger']
+        if bb_cols:
+            specs = [self.strategies[i] for i in bb_cols]
+            mid = np.column_stack([means[s['bb_window']] for s in specs])
+            std = np.column_stack([stds[s['bb_window']] for s in specs])
+            k = np.array([s['num_std'] for s in specs], dtype=np.float64)
+            long_cond = close[:, None] > mid + k * std
+            short_cond = close[:, None] < mid - k * std
+            out[:, bb_cols] = long_cond.astype(np.int8) - short_cond.astype(np.int8)
+
+        return pd.DataFrame(out, index=df.index, columns=self.names)
+
+    @staticmethod
+    def to_signals(df, directions, name):
+        """
+        Attach one variant's column as Signal/direction, like SignalGenerator.
+
+        Args:
+            df: Feature DataFrame
+            directions: Output of compute()
+            name: Strategy column to use
+
+        Returns:
+            DataFrame with Signal and direction columns added
+        """
+        df = df.copy()
+        direction = directions[name].reindex(df.index).fillna(0).astype(int)
+        df['direction'] = direction
+        df['Signal'] = np.select([direction == 1, direction == -1], ['LONG', 'SHORT'], 'FLAT')
+        return df
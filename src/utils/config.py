@@ -10,6 +10,7 @@ TICKER = "SONATSOFTW.NS"
 # Date Range
 DATA_START = "2025-11-01"
 DATA_END = "2025-12-31"
+BAR_ARCHIVE_DIR = None       # e.g. "data_archive" to serve load_data from a memory-mapped BarArchive
 
 # Capital & Risk
 INITIAL_CAPITAL = 100000
@@ -23,3 +24,36 @@ WINDOW_SIZE_DAYS = 20
 # Trade Parameters
 HOLD_HORIZON = 1
 ML_VETO_THRESHOLD = 0.40
+ML_C_GRID = None             # e.g. [0.001, 0.01, 0.1, 1.0, 10.0] to select C along a regularization path
+
+# Exits (distances in ATRs; None disables the rule)
+STOP_ATR_MULT = 1.2          # also sets the position-sizing risk distance
+UNSTOPPED_RISK_ATR_MULT = 1.2  # sizing distance when neither stop nor trail is enabled
+TARGET_ATR_MULT = None
+TRAIL_ATR_MULT = None
+EXIT_SAME_BAR = 'stop'       # level assumed hit first when stop and target share a bar
+
+# Live Tick Ingestion
+BAR_RESOLUTION_SECONDS = 60
+TICK_BUFFER_CAPACITY = 65536   # recent ticks kept per symbol
+BAR_BUFFER_CAPACITY = 4096     # completed bars held per symbol until drained
+BAR_CLOSE_DELAY_MS = 1000      # grace for late ticks before a finished bar is closed by the clock
+
+# Rule Variant Screening (SignalMatrix grid)
+SCREEN_SMA_WINDOWS = [10, 20, 30]
+SCREEN_RSI_BANDS = [(30, 70), (25, 75), (35, 65)]
+SCREEN_BB_WINDOWS = [20]
+SCREEN_BB_STDS = [1.5, 2.0]
+
+# Sharded Execution (coordinator address for TCP workers)
+SHARD_HOST = "127.0.0.1"
+SHARD_PORT = 50555
+SHARD_MAX_RETRIES = 2
+
+# Incremental Runs
+CHECKPOINT_PATH = "backtest_results/pipeline_checkpoint.pkl"
+FEATURE_WARMUP_BARS = 30     # extra raw bars kept so rebuilt indicators match a full run
+
+# Latency Tracing (live execution path)
+LATENCY_EXPORT_INTERVAL_S = 60   # seconds between percentile exports
+LATENCY_EXPORT_PATH = "logs/latency.csv"
@@ -0,0 +1,41 @@
+# Date indexing helpers
+"""
+Binary-search date slicing for time-indexed DataFrames.
+"""
+
+import pandas as pd
+
+
+def date_bounds(index, start=None, end=None):
+    """
+    Locate an inclusive [start, end] date range in a sorted DatetimeIndex.
+
+    Args:
+        index: Ascending DatetimeIndex
+        start: First date to include (None for the beginning)
+        end: Last date to include (None for the end)
+
+    Returns:
+        Tuple of (lo, hi) integer positions, suitable for iloc[lo:hi]
+    """
+    lo = index.searchsorted(pd.Timestamp(start), side='left') if start is not None else 0
+    hi = index.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(index)
+    return lo, max(lo, hi)
+
+
+def date_slice(df, start=None, end=None):
+    """
+    Select rows with start <= date <= end in O(log n).
+
+    Equivalent to masking with (df.index >= start) & (df.index <= end) on an
+    ascending index; falls back to the boolean mask if the index is unsorted.
+    """
+    if not df.index.is_monotonic_increasing:
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df.index >= pd.Timestamp(start)
+        if end is not None:
+            mask &= df.index <= pd.Timestamp(end)
+        return df[mask.to_numpy()]
+    lo, hi = date_bounds(df.index, start, end)
+    return df.iloc[lo:hi]
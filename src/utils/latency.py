@@ -0,0 +1,204 @@
+# Latency tracing module
+"""
+Per-bar latency tracing for the live execution path.
+
+Each stage of a bar's journey (data received -> features -> signal -> ML
+probability -> sizing -> order sent -> broker ack) is timestamped with
+perf_counter_ns per (symbol, bar). Latencies go into fixed-size log-linear
+histograms (HDR style: under 1.6% relative precision, constant memory, O(1)
+record), and percentiles are exported periodically by maybe_export, which
+the live loop calls off the order path.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from src.utils.config import LATENCY_EXPORT_INTERVAL_S, LATENCY_EXPORT_PATH
+
+
+STAGES = ('data_received', 'features_updated', 'signal', 'ml_prob', 'sizing', 'order_sent', 'broker_ack')
+
+
+class LatencyHistogram:
+    """Log-linear histogram of non-negative integer latencies (nanoseconds)."""
+
+    def __init__(self, sub_bucket_bits=7, max_exponent=40):
+        """
+        Args:
+            sub_bucket_bits: Linear sub-buckets per power of two (2**bits);
+                             7 bits gives under 1.6% bucket width
+            max_exponent: Largest recordable value is about 2**max_exponent ns
+        """
+        self.sub_bits = sub_bucket_bits
+        self.sub_count = 1 << sub_bucket_bits
+        self.half = self.sub_count >> 1
+        self.max_value = (1 << max_exponent) - 1
+        n_buckets = self.sub_count + (max_exponent - sub_bucket_bits + 1) * self.half
+        # Plain list: scalar increments are several times cheaper than on an ndarray
+        self.counts = [0] * n_buckets
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def _lower_bound(self, idx):
+        """Smallest value that falls in bucket idx."""
+        if idx < self.sub_count:
+            return idx
+        shift = (idx - self.sub_count) // self.half + 1
+        return ((idx - self.sub_count) % self.half + self.half) << shift
+
+    def record(self, value_ns):
+        """Add one latency (an int from a nanosecond clock)."""
+        v = int(value_ns)
+        if v < 0:
+            v = 0
+        if v > self.max_value:
+            v = self.max_value
+        # Exact buckets below sub_count, then `half` linear buckets per power of two
+        if v < self.sub_count:
+            self.counts[v] += 1
+        else:
+            shift = v.bit_length() - self.sub_bits
+            self.counts[self.sub_count + (shift - 1) * self.half + (v >> shift) - self.half] += 1
+        self.total += 1
+        self.sum += v
+        if v > self.max:
+            self.max = v
+        if self.min is None or v < self.min:
+            self.min = v
+
+    def percentile(self, q):
+        """Value at percentile q (0-100), reported as its bucket's upper edge."""
+        if self.total == 0:
+            return 0
+        rank = max(1, int(np.ceil(q / 100.0 * self.total)))
+        idx = int(np.searchsorted(np.cumsum(self.counts), rank))
+        upper = self._lower_bound(idx + 1) - 1 if idx + 1 < len(self.counts) else self.max_value
+        return min(upper, self.max)
+
+    def merge(self, other):
+        """Add another histogram with the same layout into this one."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+
+class LatencyTracer:
+    """Timestamps pipeline stages per (symbol, bar) and aggregates latencies."""
+
+    def __init__(self, stages=STAGES, export_interval_s=LATENCY_EXPORT_INTERVAL_S,
+                 export_path=LATENCY_EXPORT_PATH, max_open_bars=10000, clock=time.perf_counter_ns):
+        """
+        Args:
+            stages: Ordered stage names; the first one starts a bar's trace
+            export_interval_s: Seconds between maybe_export writes (None disables)
+            export_path: CSV to append percentiles to (None prints them)
+            max_open_bars: Traces kept in flight before the oldest are dropped
+            clock: Nanosecond clock
+        """
+        self.stages = tuple(stages)
+        self.stage_idx = {s: i for i, s in enumerate(self.stages)}
+        self.clock = clock
+        self.export_interval_ns = int(export_interval_s * 1e9) if export_interval_s else None
+        self.export_path = export_path
+        self.max_open_bars = max_open_bars
+        # Latency since data_received (total) and since the previous stage seen (hop)
+        self.total = {s: LatencyHistogram() for s in self.stages[1:]}
+        self.hop = {s: LatencyHistogram() for s in self.stages[1:]}
+        self._open = {}
+        self._last_export = clock()
+
+    def mark(self, symbol, bar_ts, stage, t_ns=None):
+        """
+        Timestamp a stage for one symbol's bar.
+
+        Only dict and histogram updates happen here; exporting is left to
+        maybe_export so no I/O lands inside a measured interval.
+
+        Args:
+            symbol: Ticker
+            bar_ts: Bar identifier (e.g. its timestamp)
+            stage: One of self.stages
+            t_ns: Timestamp from self.clock (taken now if None)
+        """
+        t = self.clock() if t_ns is None else t_ns
+        i = self.stage_idx[stage]
+        key = (symbol, bar_ts)
+        if i == 0:
+            if len(self._open) >= self.max_open_bars:
+                self._open.pop(next(iter(self._open)))
+            self._open[key] = [t, t]  # [start, last stage time]
+        else:
+            trace = self._open.get(key)
+            if trace is not None:
+                self.total[stage].record(t - trace[0])
+                self.hop[stage].record(t - trace[1])
+                trace[1] = t
+                if i == len(self.stages) - 1:
+                    del self._open[key]
+
+    def maybe_export(self, now_ns=None):
+        """
+        Export if export_interval_s has passed since the last export.
+
+        Call between bars or after the broker ack, never mid-trace.
+
+        Returns:
+            The exported table, or None if not due
+        """
+        if self.export_interval_ns is None:
+            return None
+        t = self.clock() if now_ns is None else now_ns
+        if t - self._last_export < self.export_interval_ns:
+            return None
+        return self.export(now_ns=t)
+
+    def close(self, symbol, bar_ts):
+        """End a trace early (e.g. the signal was FLAT or vetoed)."""
+        self._open.pop((symbol, bar_ts), None)
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        Percentile table in microseconds.
+
+        Returns:
+            DataFrame indexed by stage with count, p50.. and max for the
+            hop from the previous stage and the total since data_received
+        """
+        rows = []
+        for stage in self.stages[1:]:
+            for kind, hist in (('hop', self.hop[stage]), ('total', self.total[stage])):
+                row = {'Stage': stage, 'Kind': kind, 'count': hist.total}
+                for q in percentiles:
+                    row[f'p{q:g}_us'] = hist.percentile(q) / 1e3
+                row['max_us'] = hist.max / 1e3
+                rows.append(row)
+        return pd.DataFrame(rows).set_index(['Stage', 'Kind'])
+
+    def export(self, now_ns=None):
+        """Write (or print) the current percentiles and restart the interval."""
+        self._last_export = self.clock() if now_ns is None else now_ns
+        table = self.summary()
+        if self.export_path:
+            table = table.reset_index()
+            table.insert(0, 'Time', pd.Timestamp.now())
+            os.makedirs(os.path.dirname(os.path.abspath(self.export_path)), exist_ok=True)
+            header = not os.path.exists(self.export_path)
+            table.to_csv(self.export_path, mode='a', header=header, index=False)
+        elif (table['count'] > 0).any():
+            print("\n--- LATENCY (us) ---")
+            print(table[table['count'] > 0].round(1))
+        return table
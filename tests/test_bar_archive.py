@@ -0,0 +1,64 @@
+# Bar archive tests
+"""
+Round trips through the memory-mapped archive and read-through backfill.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.bar_archive import BarArchive
+
+
+def _bars(start, n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': rng.integers(1, 1000, n).astype(float)},
+                        index=pd.bdate_range(start, periods=n, name='Date'))
+
+
+def _assert_same(got, expected):
+    np.testing.assert_array_equal(got.index.as_unit('ns').asi8, expected.index.as_unit('ns').asi8)
+    np.testing.assert_array_equal(got.to_numpy(), expected[BarArchive.COLUMNS].to_numpy())
+
+
+def test_write_append_and_window(tmp_path):
+    df = _bars('2024-01-01', 60)
+    archive = BarArchive(str(tmp_path))
+    archive.write('A.NS', df.iloc[:40])
+    archive.append('A.NS', df.iloc[30:])  # overlap is ignored
+    assert archive.symbols() == ['A.NS'] and 'A.NS' in archive
+
+    _assert_same(archive.load('A.NS'), df)
+    window = archive.load('A.NS', '2024-01-10', '2024-01-20')
+    _assert_same(window, df.loc['2024-01-10':'2024-01-20'])
+    assert archive.load('A.NS', '2030-01-01').empty
+
+    # Timestamps and prices live in one file, so a reopened archive sees both
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['A.NS.bars.npy']
+    _assert_same(BarArchive(str(tmp_path)).load('A.NS'), df)
+
+
+def test_window_before_archive_is_backfilled(tmp_path, monkeypatch):
+    data_loader = pytest.importorskip('src.data.data_loader')
+    df = _bars('2024-01-01', 60)
+    calls = []
+
+    def fake_load(ticker, start_date, end_date, fyers_secrets_path=None, archive_root=None):
+        calls.append((start_date, end_date))
+        return df.loc[start_date:end_date]
+
+    monkeypatch.setattr(data_loader, 'load_data', fake_load)
+    archive = BarArchive(str(tmp_path))
+    archive.write('A.NS', df.iloc[20:])
+    end = df.index[-1].strftime('%Y-%m-%d')
+
+    got = data_loader._load_archived('A.NS', '2024-01-01', end, None, str(tmp_path))
+    _assert_same(got, df)
+    _assert_same(archive.load('A.NS'), df)
+
+    # Already covered: no further downloads
+    calls.clear()
+    data_loader._load_archived('A.NS', '2024-01-01', end, None, str(tmp_path))
+    assert calls == []
@@ -0,0 +1,117 @@
+# Exit engine tests
+"""
+Vectorized exits against a bar-by-bar reference, and the batch backtest
+against per-column run_backtest.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.execution.execution_engine import ExecutionEngine
+from src.execution.exit_engine import ExitEngine
+from src.features.feature_engineer import FeatureEngineer
+
+
+def _ohlc(seed, n):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.015, n))  # frequent gaps through the levels
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n)))
+    return open_, high, low, close
+
+
+def _reference(engine, open_, high, low, entry_idx, direction, entry_price, atr):
+    """One trade, one bar at a time, in plain Python."""
+    d = direction
+    stop = entry_price * d - engine.stop_atr_mult * atr if engine.stop_atr_mult else -np.inf
+    target = entry_price * d + engine.target_atr_mult * atr if engine.target_atr_mult else np.inf
+    best = entry_price * d
+    horizon = engine.max_hold_bars if engine.max_hold_bars is not None else len(open_)
+    for j in range(entry_idx, min(entry_idx + horizon, len(open_))):
+        o = open_[j] * d
+        adverse = (low[j] if d > 0 else high[j]) * d
+        favorable = (high[j] if d > 0 else low[j]) * d
+        protect, reason = stop, 'STOP'
+        if engine.trail_atr_mult and best - engine.trail_atr_mult * atr > protect:
+            protect, reason = best - engine.trail_atr_mult * atr, 'TRAIL'
+        p_hit, t_hit = adverse <= protect, favorable >= target
+        if p_hit or t_hit:
+            if t_hit and o >= target:
+                return j, o * d, 'TARGET', True
+            if p_hit and o <= protect:
+                return j, o * d, reason, True
+            if t_hit and (not p_hit or engine.same_bar == 'target'):
+                return j, target * d, 'TARGET', False
+            return j, protect * d, reason, False
+        best = max(best, favorable)
+    if engine.max_hold_bars is not None and entry_idx + engine.max_hold_bars < len(open_):
+        j = entry_idx + engine.max_hold_bars
+        return j, open_[j], 'TIME', True
+    return -1, np.nan, '', False
+
+
+@pytest.mark.parametrize('same_bar', ['stop', 'target'])
+@pytest.mark.parametrize('kwargs', [
+    dict(stop_atr_mult=1.0, target_atr_mult=1.5),
+    dict(stop_atr_mult=2.0, target_atr_mult=1.0, trail_atr_mult=1.0),
+    dict(stop_atr_mult=None, trail_atr_mult=0.8, max_hold_bars=7),
+    dict(stop_atr_mult=0.5, target_atr_mult=0.5, max_hold_bars=3),
+    dict(stop_atr_mult=None, max_hold_bars=4),
+])
+def test_evaluate_matches_bar_by_bar_reference(kwargs, same_bar):
+    open_, high, low, _ = _ohlc(0, 400)
+    rng = np.random.default_rng(1)
+    n = 300
+    entry_idx = rng.integers(0, len(open_), n)
+    direction = rng.choice([-1, 1], n)
+    entry_price = open_[entry_idx]
+    atr = entry_price * rng.uniform(0.005, 0.03, n)
+    # Small blocks so trades cross block boundaries
+    engine = ExitEngine(same_bar=same_bar, block_bars=5, **kwargs)
+
+    got = engine.evaluate(open_, high, low, entry_idx, direction, entry_price, atr)
+    for i in range(n):
+        exp = _reference(engine, open_, high, low, entry_idx[i], direction[i], entry_price[i], atr[i])
+        assert got[0][i] == exp[0] and got[2][i] == exp[2] and got[3][i] == exp[3], (i, exp)
+        np.testing.assert_allclose(got[1][i], exp[1], rtol=1e-12)
+    # The paths exercise both gap fills and fills at a level
+    levels = (got[2] != '') & (got[2] != 'TIME')
+    if engine.stop_atr_mult or engine.trail_atr_mult:
+        assert got[3][levels].any() and not got[3][levels].all()
+
+
+def test_levels_report_initial_trail_as_stop():
+    assert ExitEngine(stop_atr_mult=None, trail_atr_mult=1.5).levels(1, 100.0, 2.0) == (97.0, pytest.approx(np.nan, nan_ok=True))
+    assert ExitEngine(stop_atr_mult=3.0, trail_atr_mult=1.0).levels(-1, 100.0, 2.0)[0] == 102.0
+    assert np.isnan(ExitEngine(stop_atr_mult=None).levels(1, 100.0, 2.0)[0])
+
+
+@pytest.mark.parametrize('exit_engine', [
+    None,
+    ExitEngine(),
+    ExitEngine(stop_atr_mult=0.5, target_atr_mult=1.0, max_hold_bars=3),
+    ExitEngine(stop_atr_mult=None, trail_atr_mult=0.8, max_hold_bars=5),
+])
+def test_batch_backtest_matches_run_backtest(exit_engine):
+    open_, high, low, close = _ohlc(2, 200)
+    idx = pd.bdate_range('2024-01-01', periods=len(close))
+    raw = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': 1.0}, index=idx)
+    features = FeatureEngineer().add_features(raw)
+    rng = np.random.default_rng(3)
+    directions = pd.DataFrame(rng.choice([-1, 0, 1], size=(len(features), 4)).astype(np.int8),
+                              index=features.index, columns=list('abcd'))
+
+    engine = ExecutionEngine(100000)
+    stats, equity = engine.run_batch_backtest(features, directions, hold_horizon_days=2, exit_engine=exit_engine)
+    for col in directions:
+        signals = features.copy()
+        signals['direction'] = directions[col]
+        signals['Signal'] = signals['direction'].map({1: 'LONG', -1: 'SHORT', 0: 'FLAT'})
+        results, _, expected = engine.run_backtest(signals, hold_horizon_days=2, exit_engine=exit_engine)
+        got = equity[col].dropna()
+        assert got.index.equals(expected.index)
+        np.testing.assert_allclose(got.to_numpy(), expected['Equity'].to_numpy())
+        for key, value in results.items():
+            assert np.isclose(value, stats.loc[col, key]), key
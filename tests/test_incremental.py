@@ -0,0 +1,122 @@
+# Incremental pipeline tests
+"""
+Chunked incremental runs must reproduce a full rerun exactly.
+"""
+
+import contextlib
+import io
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.feature_engineer import FeatureEngineer
+from src.signals.signal_generator import SignalGenerator
+from src.execution.execution_engine import ExecutionEngine
+from src.execution.exit_engine import ExitEngine
+from src.backtest.pipeline import DEFAULT_PARAMS, walk_forward_filter
+from src.backtest.incremental import PipelineCheckpoint, run_daily, run_incremental
+
+
+def _synthetic_bars(rng, n=150):
+    idx = pd.bdate_range('2024-01-01', periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * np.exp(rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + rng.random(n) * 0.01)
+    low = np.minimum(open_, close) * (1 - rng.random(n) * 0.01)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': 1e5}, index=idx)
+
+
+def _full_run(raw, p):
+    df_signals = SignalGenerator(threshold=1).generate_signals(FeatureEngineer().add_features(raw))
+    experiment_signals, _, _ = walk_forward_filter(
+        df_signals,
+        veto_threshold=p['veto_threshold'],
+        warmup_days=p['warmup_days'],
+        window_size_days=p['window_size_days'],
+        c_grid=p['c_grid']
+    )
+    exit_engine = ExitEngine(
+        stop_atr_mult=p['stop_atr_mult'],
+        target_atr_mult=p['target_atr_mult'],
+        trail_atr_mult=p['trail_atr_mult'],
+        max_hold_bars=p['hold_horizon']
+    )
+    return ExecutionEngine(initial_capital=100000).run_backtest(
+        experiment_signals, hold_horizon_days=p['hold_horizon'], exit_engine=exit_engine)
+
+
+@pytest.mark.parametrize('seed, c_grid', [(0, None), (1, None), (2, [0.01, 0.1, 1.0]), (3, [0.01, 0.1, 1.0])])
+def test_chunked_runs_match_full_run(tmp_path, seed, c_grid):
+    rng = np.random.default_rng(seed)
+    raw = _synthetic_bars(rng)
+    params = {'stop_atr_mult': 1.0, 'target_atr_mult': 1.5, 'hold_horizon': 3, 'c_grid': c_grid}
+    p = dict(DEFAULT_PARAMS)
+    p.update(params)
+    path = str(tmp_path / 'checkpoint.pkl')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats_full, log_full, equity_full = _full_run(raw, p)
+
+        # Random 1-3 bar chunks, with a save/load round trip after each
+        checkpoint = PipelineCheckpoint(params=params, initial_capital=100000)
+        i = 0
+        while i < len(raw):
+            i += int(rng.integers(1, 4))
+            checkpoint, results = run_incremental(raw.iloc[:i], checkpoint)
+            checkpoint.save(path)
+            checkpoint = PipelineCheckpoint.load(path)
+
+    assert not log_full.empty
+    stats_inc, log_inc, equity_inc = results
+    for key, value in stats_full.items():
+        assert np.isclose(stats_inc[key], value), key
+    pd.testing.assert_frame_equal(log_inc, log_full)
+    pd.testing.assert_frame_equal(equity_inc, equity_full)
+
+
+def test_checkpoint_written_from_main_loads_elsewhere(tmp_path):
+    # Simulate `python -m src.backtest.incremental`: the class lives in __main__
+    import __main__
+    checkpoint = PipelineCheckpoint()
+    main_cls = type('PipelineCheckpoint', (PipelineCheckpoint,), {'__module__': '__main__'})
+    checkpoint.__class__ = main_cls
+    __main__.PipelineCheckpoint = main_cls
+    try:
+        path = str(tmp_path / 'checkpoint.pkl')
+        checkpoint.save(path)
+    finally:
+        del __main__.PipelineCheckpoint
+
+    loaded = PipelineCheckpoint.load(path)
+    assert type(loaded) is PipelineCheckpoint
+    assert loaded.params == checkpoint.params
+
+
+@pytest.mark.parametrize('first_bars', [5, 0])
+def test_run_daily_survives_short_or_empty_first_history(tmp_path, monkeypatch, first_bars):
+    raw = _synthetic_bars(np.random.default_rng(5), n=60)
+    history = [raw.iloc[:first_bars], raw]
+    calls = []
+
+    def fake_load_data(ticker, start_date, end_date, fyers_secrets_path=None):
+        calls.append(start_date)
+        return history[len(calls) - 1].loc[start_date:end_date]
+
+    # Stand in for the network data source
+    monkeypatch.setitem(sys.modules, 'src.data.data_loader', types.SimpleNamespace(load_data=fake_load_data))
+    path = str(tmp_path / 'checkpoint.pkl')
+    end = raw.index[-1].strftime('%Y-%m-%d')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_daily(checkpoint_path=path, start_date='2024-01-01', end_date=end)
+        first = PipelineCheckpoint.load(path)
+        run_daily(checkpoint_path=path, start_date='2024-01-01', end_date=end)
+
+    assert first.backtest_state is not None and len(first.raw_tail) == first_bars
+    # With no bars yet the second run starts over from start_date
+    expected_from = raw.index[first_bars - 1].strftime('%Y-%m-%d') if first_bars else '2024-01-01'
+    assert calls == ['2024-01-01', expected_from]
+    assert PipelineCheckpoint.load(path).last_bar_date == raw.index[-1]
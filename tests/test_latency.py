@@ -0,0 +1,65 @@
+# Latency tracing tests
+"""
+Histogram accuracy and export placement for LatencyTracer, and the traced
+LiveTrader path.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.execution.live_trader import LiveTrader
+from src.utils.latency import LatencyHistogram, LatencyTracer
+
+
+def test_percentiles_within_bucket_width():
+    values = np.random.default_rng(0).lognormal(11, 1.5, 50000).astype(np.int64)
+    hist = LatencyHistogram()
+    for v in values:
+        hist.record(v)
+    for q in (50, 90, 99, 99.9):
+        expected = np.percentile(values, q, method='inverted_cdf')
+        assert abs(hist.percentile(q) - expected) / expected < 0.016
+    assert hist.percentile(100) == values.max()
+    assert hist.total == len(values)
+
+
+def test_mark_never_exports():
+    clock = iter(range(0, 10**12, 10**9)).__next__  # one second per reading
+    tracer = LatencyTracer(export_interval_s=1, export_path=None, clock=clock)
+    exported = []
+    tracer.export = lambda now_ns=None: exported.append(now_ns)
+
+    for stage in tracer.stages:
+        tracer.mark('A', 0, stage)
+    assert exported == []
+    assert tracer.total['broker_ack'].total == 1
+
+    tracer.maybe_export()
+    assert len(exported) == 1
+
+
+class _AlwaysUp:
+    def predict_probs(self, df):
+        return np.ones(len(df))
+
+
+def test_live_trader_returns_intents_with_open_traces():
+    rng = np.random.default_rng(0)
+    n = 120
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    bars = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': 1e5}, index=pd.bdate_range('2024-01-01', periods=n))
+    tracer = LatencyTracer(export_interval_s=None)
+    trader = LiveTrader(_AlwaysUp(), capital=100000, tracer=tracer)
+
+    intents = []
+    for ts in bars.index:
+        tracer.mark('A.NS', ts, 'data_received')
+        intent = trader.on_bars('A.NS', bars.loc[[ts]])
+        if intent is not None:
+            intents.append(intent)
+            tracer.close('A.NS', ts)  # not routed to a broker
+
+    assert intents and all(i['qty'] > 0 and i['side'] in (1, -1) for i in intents)
+    assert tracer.total['sizing'].total == len(intents)
+    assert tracer.total['order_sent'].total == 0 and not tracer._open
@@ -0,0 +1,49 @@
+# ML filter tests
+"""
+The NumPy scoring kernel must agree with sklearn's predict_proba.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.feature_engineer import FeatureEngineer
+from src.models.logistic_filter import MLFilter
+
+
+def _features(seed, n=120, tick=None):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range('2025-06-01', periods=n)
+    close = 100 + rng.standard_normal(n).cumsum()
+    if tick is not None:
+        close = np.round(close / tick) * tick  # flat days give a third (0.0) class
+    open_ = close + rng.standard_normal(n) * 0.5
+    raw = pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + 1, 'Low': np.minimum(open_, close) - 1,
+                        'Close': close, 'Volume': 1e5}, index=idx)
+    return FeatureEngineer().add_features(raw)
+
+
+@pytest.mark.parametrize('seed, tick', [(0, None), (1, None), (2, 1.0), (3, 1.0)])
+@pytest.mark.parametrize('C', [0.01, 0.1, 10.0])
+def test_kernel_matches_predict_proba(seed, tick, C):
+    df = _features(seed, tick=tick)
+    ml_filter = MLFilter(C=C)
+    ml_filter.train(df)
+    assert ml_filter.is_trained and ml_filter.kernel is not None
+
+    X, valid = ml_filter._feature_matrix(df)
+    X_ref, _ = ml_filter._prepare_data(df, training=False)
+    np.testing.assert_array_equal(X[valid], X_ref.to_numpy())
+
+    classes = list(ml_filter.model.classes_)
+    expected = ml_filter.model.predict_proba(X_ref)[:, classes.index(1.0)]
+    np.testing.assert_allclose(ml_filter.kernel.predict_up(X[valid]), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_predict_probs_same_with_and_without_kernel():
+    df = _features(4)
+    ml_filter = MLFilter()
+    ml_filter.train(df)
+    with_kernel = ml_filter.predict_probs(df)
+    ml_filter.kernel = None
+    np.testing.assert_allclose(with_kernel, ml_filter.predict_probs(df), rtol=1e-9, atol=1e-12)
@@ -0,0 +1,118 @@
+# Sharded execution tests
+"""
+Coordinator protocol, retries, steals and timeouts with local workers.
+"""
+
+import functools
+import os
+import pickle
+import socket
+import threading
+import time
+
+import pandas as pd
+
+from src.backtest.sharding import (
+    ShardCoordinator, _HEADER, _recv_msg, _send_msg, make_units, run_sharded, spawn_local_workers
+)
+
+
+def _result(symbol):
+    equity = pd.DataFrame({'Equity': [100.0, 101.0]}, index=pd.bdate_range('2024-01-01', periods=2))
+    return {'Total Return': 1.0}, pd.DataFrame({'Side': ['LONG']}), equity
+
+
+def _task(marker_dir, symbol, params):
+    """Succeeds, except: BAD always raises, CRASH kills its worker once, SLOW stalls once."""
+    if symbol == 'BAD':
+        raise ValueError("bad symbol")
+    marker = os.path.join(marker_dir, symbol)
+    first = not os.path.exists(marker)
+    open(marker, 'a').close()
+    if symbol == 'CRASH' and first:
+        os._exit(1)
+    if symbol == 'SLOW' and first:
+        time.sleep(3)
+    return _result(symbol)
+
+
+def test_failed_units_returned_with_results(tmp_path):
+    task = functools.partial(_task, str(tmp_path))
+    stats, trade_log, equity, failed = run_sharded(
+        ['A', 'BAD', 'CRASH', 'B'], param_grid={'hold': [1, 2]}, n_local_workers=3,
+        host='127.0.0.1', port=0, task_fn=task, timeout=60)
+
+    assert set(stats.index) == {(s, f"hold={h}") for s in ('A', 'B', 'CRASH') for h in (1, 2)}
+    assert set(failed) == {('BAD', 'hold=1'), ('BAD', 'hold=2')}
+    assert all('bad symbol' in error for error in failed.values())
+    assert set(trade_log['Symbol']) == {'A', 'B', 'CRASH'} and equity.shape[1] == 6
+
+
+def test_idle_worker_steals_stalled_unit(tmp_path):
+    task = functools.partial(_task, str(tmp_path))
+    coordinator = ShardCoordinator(make_units(['SLOW', 'A', 'B']), host='127.0.0.1', port=0)
+    procs = spawn_local_workers(2, *coordinator.address, task_fn=task)
+    try:
+        start = time.monotonic()
+        stats, _, _, failed = coordinator.run(timeout=30)
+        elapsed = time.monotonic() - start
+    finally:
+        for proc in procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+    assert len(stats) == 3 and not failed
+    assert coordinator.steals >= 1 and elapsed < 3
+
+
+def _client(address, replies, seen, release=None):
+    """Raw worker: answers each task with the next canned payload (bytes or message)."""
+    with socket.create_connection(address) as sock:
+        _send_msg(sock, {'type': 'ready', 'worker': 'raw'})
+        for reply in replies:
+            msg = _recv_msg(sock)
+            seen.append(msg['type'])
+            if msg['type'] != 'task':
+                return
+            if reply is None:
+                release.wait()  # hold the unit without replying
+                return
+            if isinstance(reply, bytes):
+                sock.sendall(_HEADER.pack(len(reply)) + reply)
+            else:
+                _send_msg(sock, reply)
+        seen.append(_recv_msg(sock)['type'])
+
+
+def test_malformed_replies_are_retried():
+    coordinator = ShardCoordinator(make_units(['A']), host='127.0.0.1', port=0, max_retries=3)
+    stats, trade_log, equity = _result('A')
+    unknown_class = b'\x80\x04cno_such_module\nThing\n.'  # ImportError on load
+    replies = [unknown_class, [1, 2], {'type': 'result'},
+               {'type': 'result', 'stats': stats, 'trade_log': trade_log, 'equity': equity}]
+    seen = []
+    client = threading.Thread(target=_client, args=(coordinator.address, replies, seen))
+    client.start()
+    stats_df, _, _, failed = coordinator.run(timeout=10)
+    client.join(timeout=5)
+
+    assert seen == ['task'] * 4 + ['stop']
+    assert coordinator.failures[0] == 3 and not failed
+    assert list(stats_df.index) == [('A', 'default')]
+
+
+def test_timeout_returns_partial_results():
+    coordinator = ShardCoordinator(make_units(['A', 'B']), host='127.0.0.1', port=0)
+    stats, trade_log, equity = _result('A')
+    done = {'type': 'result', 'stats': stats, 'trade_log': trade_log, 'equity': equity}
+    seen, release = [], threading.Event()
+    # Answers the first unit, then holds the second without replying
+    client = threading.Thread(target=_client, args=(coordinator.address, [done, None], seen, release))
+    client.start()
+    stats_df, _, _, failed = coordinator.run(timeout=1)
+    release.set()
+    client.join(timeout=5)
+
+    assert list(stats_df.index) == [('A', 'default')]
+    assert list(failed) == [('B', 'default')] and 'timed out' in failed[('B', 'default')]
+    assert coordinator.failures[1] == 0
@@ -0,0 +1,124 @@
+# Tick ingestion tests
+"""
+Bar aggregation against a pandas resample, ring buffers and clock-driven closes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data.tick_stream import BarAggregator, TICK_DTYPE, TickReplayServer, TickStreamClient
+
+
+T0 = 1_699_999_980_000  # epoch ms, on a minute boundary
+
+
+def _ticks(rng, n, span_ms):
+    ts = np.sort(rng.choice(span_ms, size=n, replace=False)) + T0
+    return pd.DataFrame({'Price': 100 + rng.standard_normal(n).cumsum() * 0.1,
+                         'Volume': rng.integers(1, 100, n).astype(float)},
+                        index=pd.to_datetime(ts, unit='ms'))
+
+
+def _resample(df, seconds=60):
+    r = df.resample(f'{seconds}s')
+    out = pd.DataFrame({'Open': r['Price'].first(), 'High': r['Price'].max(), 'Low': r['Price'].min(),
+                        'Close': r['Price'].last(), 'Volume': r['Volume'].sum()})
+    return out.dropna()
+
+
+def _records(symbol_ids, df_by_symbol):
+    parts = []
+    for sid, df in zip(symbol_ids, df_by_symbol):
+        rec = np.zeros(len(df), dtype=TICK_DTYPE)
+        rec['symbol_id'] = sid
+        rec['ts'] = df.index.as_unit('ms').asi8
+        rec['price'] = df['Price'].to_numpy()
+        rec['volume'] = df['Volume'].to_numpy()
+        parts.append(rec)
+    out = np.concatenate(parts)
+    return out[np.argsort(out['ts'], kind='stable')]
+
+
+def test_replayed_bars_match_resample_and_ring_wraps():
+    rng = np.random.default_rng(0)
+    symbols = ['A.NS', 'B.NS', 'C.NS']
+    ticks = {s: _ticks(rng, 5000, 1_800_000) for s in symbols}
+
+    server = TickReplayServer(ticks, chunk_ticks=777)
+    host, port = server.start()
+    aggregator = BarAggregator(symbols, 60, tick_capacity=1000, bar_capacity=1000)
+    try:
+        # Small reads split bars across batches, exercising the open-bar merge
+        TickStreamClient(host, port, aggregator, batch_ticks=333).run()
+    finally:
+        server.stop()
+    aggregator.flush()
+
+    assert aggregator.late_ticks == 0 and aggregator.dropped_bars == 0
+    for s in symbols:
+        got = aggregator.drain_bars(s)
+        expected = _resample(ticks[s])
+        np.testing.assert_array_equal(got.index.asi8, expected.index.asi8)
+        np.testing.assert_allclose(got.to_numpy(), expected[got.columns].to_numpy())
+
+        # Ring buffer holds the newest 1000 ticks, oldest first
+        ts, price, _ = aggregator.recent_ticks(s)
+        np.testing.assert_array_equal(ts, ticks[s].index.as_unit('ms').asi8[-1000:])
+        np.testing.assert_allclose(price, ticks[s]['Price'].to_numpy()[-1000:])
+
+
+def test_bar_overflow_keeps_newest_bars():
+    rng = np.random.default_rng(1)
+    df = _ticks(rng, 3000, 600_000)  # 10 minutes
+    aggregator = BarAggregator(['A.NS'], 60, bar_capacity=4)
+    batch = _records([0], [df])
+    for chunk in np.array_split(batch, 7):
+        aggregator.on_ticks(chunk)
+    aggregator.flush()
+
+    got = aggregator.drain_bars('A.NS')
+    expected = _resample(df)
+    assert aggregator.dropped_bars == len(expected) - 4
+    np.testing.assert_allclose(got.to_numpy(), expected[got.columns].to_numpy()[-4:])
+    assert aggregator.drain_bars('A.NS').empty
+
+
+def test_close_due_hands_off_quiet_symbol_and_rejects_late_ticks():
+    aggregator = BarAggregator(['A.NS', 'B.NS'], 60)
+    tick = np.zeros(1, dtype=TICK_DTYPE)
+    tick['symbol_id'], tick['ts'], tick['price'], tick['volume'] = 1, T0 + 5_000, 100.0, 10.0
+    aggregator.on_ticks(tick)
+
+    assert aggregator.close_due(T0 + 59_999) == 0
+    assert aggregator.close_due(T0 + 60_000) == 1
+    bars = aggregator.drain_bars('B.NS')
+    assert len(bars) == 1 and bars['Close'].iloc[0] == 100.0
+
+    # A straggler for the closed minute must not reopen it
+    tick['ts'] = T0 + 59_000
+    aggregator.on_ticks(tick)
+    aggregator.flush()
+    assert aggregator.late_ticks == 1
+    assert aggregator.drain_bars('B.NS').empty
+
+
+def test_client_closes_bars_on_feed_clock():
+    rng = np.random.default_rng(2)
+    busy = _ticks(rng, 2000, 300_000)  # 5 minutes of ticks
+    quiet = busy.iloc[:1]              # one tick in the first minute
+    server = TickReplayServer({'A.NS': busy, 'B.NS': quiet}, chunk_ticks=100)
+    host, port = server.start()
+    aggregator = BarAggregator(['A.NS', 'B.NS'], 60)
+    handed_off = []
+
+    def on_batch(agg):
+        if not handed_off and len(agg.drain_bars('B.NS')):
+            handed_off.append(client.ticks_received)
+
+    client = TickStreamClient(host, port, aggregator, batch_ticks=100, close_delay_ms=1000)
+    try:
+        client.run(on_batch=on_batch)
+    finally:
+        server.stop()
+    # B's bar left before the stream ended, without any later B tick or flush
+    assert handed_off and handed_off[0] < client.ticks_received